@@ -3,6 +3,7 @@ from typing import Annotated
 from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 
+from app.api.routing import UnitOfWorkRoute
 from app.deps import Deps
 from app.schemas.utils import Token
 from app.services import AuthService
@@ -10,6 +11,7 @@ from app.services import AuthService
 auth_router = APIRouter(
     tags=["Auth"],
     prefix="/auth",
+    route_class=UnitOfWorkRoute,
 )
 
 
@@ -4,11 +4,13 @@ from fastapi import (
     APIRouter,
     Depends,
     UploadFile,
-    File
+    File,
+    Request,
 )
-from fastapi_cache.decorator import cache
 
-from app.api.types import BookServiceType, CurrentReaderType, PaginationType
+from app.api.routing import UnitOfWorkRoute
+from app.api.types import BookServiceType, CurrentPrincipalType, FieldsType, PaginationType
+from app.models import BookCopyORM, BookORM, HistoryORM
 from app.models.types import Role
 from app.schemas import (
     BookCreateDTO,
@@ -16,22 +18,30 @@ from app.schemas import (
     MultiDTO,
     BookCopyCreateDTO,
     BookCopyFullDTO,
-    BookClearDTO
+    BookClearDTO,
+    BookImportDTO,
+    ImportFormat,
 )
 from app.schemas.relations import BookRelationDTO
 from app.schemas.utils import BookFilter
 from app.utils.errors import Forbidden
+from app.utils.etag import conditional
+from app.utils.response_cache import CATALOG_TAG, book_tag, response_cache
 
 book_router = APIRouter(
     tags=["Books"],
     prefix="/books",
+    route_class=UnitOfWorkRoute,
 )
 
+# books also change through the counters kept by triggers on copies and requests
+BOOK_TABLES = (BookORM, BookCopyORM, HistoryORM)
+
 
 @book_router.post("")
 async def create_book(
         book: BookCreateDTO,
-        current_reader: CurrentReaderType,
+        current_reader: CurrentPrincipalType,
         book_service: BookServiceType,
 ) -> BookDTO:
     if current_reader.role == Role.READER:
@@ -44,7 +54,7 @@ async def create_book(
 @book_router.post("/multi")
 async def create_multi(
         books: List[BookCreateDTO],
-        current_reader: CurrentReaderType,
+        current_reader: CurrentPrincipalType,
         book_service: BookServiceType,
 ) -> List[BookDTO]:
     if current_reader.role == Role.READER:
@@ -54,25 +64,55 @@ async def create_multi(
     return dto_books
 
 
-@cache(expire=3600)
+@book_router.post("/import")
+async def import_books(
+        request: Request,
+        format: ImportFormat,
+        current_reader: CurrentPrincipalType,
+        book_service: BookServiceType,
+) -> BookImportDTO:
+    if current_reader.role == Role.READER:
+        raise Forbidden
+
+    result = await book_service.import_books(request.stream(), format)
+    return result
+
+
 @book_router.get("")
 async def get_books(
+        request: Request,
         pg: PaginationType,
+        fields: FieldsType,
         book_filters: Annotated[BookFilter, Depends()],
         book_service: BookServiceType,
 ) -> MultiDTO[BookRelationDTO]:
-    books = await book_service.get_multi(pg, book_filters=book_filters)
-    return books
+    # the page is rendered to JSON by Postgres
+    return await conditional( # type: ignore
+        request,
+        BOOK_TABLES,
+        lambda: response_cache.response(
+            request,
+            tags=[CATALOG_TAG],
+            render=lambda: book_service.get_multi_json(pg, book_filters=book_filters, fields=fields),
+        ),
+    )
 
 
-@cache(expire=3600)
 @book_router.get("/{book_id}")
 async def get_book(
+        request: Request,
         book_id: int,
         book_service: BookServiceType
 ) -> BookRelationDTO:
-    book: BookRelationDTO = await book_service.get_single(id=book_id) # type: ignore
-    return book
+    async def render() -> str:
+        book: BookRelationDTO = await book_service.get_single(id=book_id) # type: ignore
+        return book.model_dump_json()
+
+    return await conditional( # type: ignore
+        request,
+        BOOK_TABLES,
+        lambda: response_cache.response(request, tags=[book_tag(book_id)], render=render),
+    )
 
 
 @book_router.put("/{book_id}")
@@ -80,7 +120,7 @@ async def update_book(
         book_id: int,
         new_book: BookClearDTO,
         book_service: BookServiceType,
-        current_reader: CurrentReaderType,
+        current_reader: CurrentPrincipalType,
 ) -> BookDTO:
     if current_reader.role == Role.READER:
         raise Forbidden
@@ -93,7 +133,7 @@ async def update_book(
 async def set_book_cover(
         book_id: int,
         cover: Annotated[UploadFile, File()],
-        current_reader: CurrentReaderType,
+        current_reader: CurrentPrincipalType,
         book_service: BookServiceType,
 ) -> BookDTO:
     if current_reader.role == Role.READER:
@@ -106,7 +146,7 @@ async def set_book_cover(
 @book_router.delete("/{book_id}")
 async def delete_book(
         book_id: int,
-        current_reader: CurrentReaderType,
+        current_reader: CurrentPrincipalType,
         book_service: BookServiceType
 ) -> BookDTO:
     if current_reader.role == Role.READER:
@@ -120,7 +160,7 @@ async def add_copies(
     book_id: int,
     copies: List[BookCopyCreateDTO],
     book_service: BookServiceType,
-    current_reader: CurrentReaderType,
+    current_reader: CurrentPrincipalType,
 ) -> List[BookCopyFullDTO]:
     if current_reader.role == Role.READER:
         raise Forbidden
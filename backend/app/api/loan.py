@@ -1,45 +1,57 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Query, Depends
+from fastapi import APIRouter, Query, Depends, Request
 from fastapi.responses import FileResponse
 
-from app.api.types import PaginationType, LoanServiceType, CurrentReaderType
+from app.api.routing import UnitOfWorkRoute
+from app.api.types import PaginationType, FieldsType, LoanServiceType, CurrentPrincipalType
+from app.models import BookCopyORM, BookORM, LoanORM, OverdueLoanORM, ProfileORM, ReaderORM
 from app.models.types import Role
 from app.schemas import MultiDTO
 from app.schemas.relations import LoanRelationDTO
 from app.schemas.utils.filters import LoanFilter
 from app.utils.errors import Forbidden
-from app.schemas.loan import LoanDTO
+from app.utils.etag import conditional
+from app.schemas.loan import LoanDTO, OverdueLoanDTO
 
 loan_router = APIRouter(
     prefix="/loans",
-    tags=["Loans"]
+    tags=["Loans"],
+    route_class=UnitOfWorkRoute,
 )
 
 
 @loan_router.get("")
 async def get_loans(
+    request: Request,
     pg: PaginationType,
+    fields: FieldsType,
     filters: Annotated[LoanFilter, Depends(LoanFilter)],
     loan_service: LoanServiceType,
-    current_reader: CurrentReaderType
+    current_reader: CurrentPrincipalType
 ) -> MultiDTO[LoanRelationDTO]:
-    if current_reader == Role.READER:
+    if current_reader.role == Role.READER:
         raise Forbidden
 
-    db_loans = await loan_service.get_loans(
-        pg=pg,
-        conditions=filters.conditions
+    async def render():
+        db_loans = await loan_service.get_loans(
+            pg=pg,
+            conditions=filters.conditions,
+            fields=fields,
+        )
+        return fields.response(db_loans)
+
+    return await conditional( # type: ignore
+        request, (LoanORM, ReaderORM, ProfileORM, BookCopyORM, BookORM), render
     )
-    return db_loans
 
 @loan_router.patch("/{loan_id}")
 async def set_loan_returned(
     loan_id: int,
     loan_service: LoanServiceType,
-    current_reader: CurrentReaderType
+    current_reader: CurrentPrincipalType
 ) -> LoanDTO:
-    if current_reader == Role.READER:
+    if current_reader.role == Role.READER:
         raise Forbidden
 
     db_loan = await loan_service.set_loan_as_returned(loan_id=loan_id)
@@ -48,21 +60,27 @@ async def set_loan_returned(
 
 @loan_router.get("/overdue")
 async def get_overdue_loans(
+    request: Request,
     pg: PaginationType,
+    fields: FieldsType,
     loan_service: LoanServiceType,
-    current_reader: CurrentReaderType
-) -> MultiDTO[LoanRelationDTO]:
+    current_reader: CurrentPrincipalType
+) -> MultiDTO[OverdueLoanDTO]:
     if current_reader.role == Role.READER:
         raise Forbidden
 
-    overdue_loans = await loan_service.get_overdue_loans(pg=pg)
-    return overdue_loans
+    async def render():
+        overdue_loans = await loan_service.get_overdue_loans(pg=pg, fields=fields)
+        return fields.response(overdue_loans)
+
+    # the view hides loans returned since its last refresh
+    return await conditional(request, (OverdueLoanORM, LoanORM), render) # type: ignore
 
 
 @loan_router.get("/overdue/report")
 async def get_overdue_report(
     pg: PaginationType,
-    current_reader: CurrentReaderType,
+    current_reader: CurrentPrincipalType,
     loan_service: LoanServiceType,
 ) -> FileResponse:
     if current_reader.role == Role.READER:
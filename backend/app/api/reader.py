@@ -1,15 +1,19 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Query, UploadFile, Request
+from fastapi import APIRouter, Depends, Query, UploadFile, Request, Response
 from starlette import status
 from starlette.responses import RedirectResponse
 
-from app.api.types import ReaderServiceType, CurrentReaderType, RequestServiceType
+from app.api.routing import UnitOfWorkRoute
+from app.api.types import ReaderServiceType, CurrentPrincipalType, RequestServiceType
 from app.schemas import ReaderCreateDTO, RequestDTO
 from app.schemas.relations import ReaderRelationDTO, RequestSemiRelationDTO, ReaderSemiRelationDTO
+from app.models import BookCopyORM, BookORM, LoanORM, ProfileORM, ReaderORM, RequestORM
 from app.models.types import RequestStatus
+from app.utils import OAuth2Utility
+from app.utils.etag import conditional
 
-reader_router = APIRouter(prefix="/readers", tags=["Readers"])
+reader_router = APIRouter(prefix="/readers", tags=["Readers"], route_class=UnitOfWorkRoute)
 
 
 @reader_router.post("")
@@ -23,22 +27,31 @@ async def create_reader(
 
 @reader_router.get("/me")
 async def get_current_reader(
-        current_reader: CurrentReaderType,
+        request: Request,
+        token: Annotated[str, Depends(OAuth2Utility.oauth2_scheme)],
+        _: CurrentPrincipalType,
 ) -> ReaderRelationDTO:
-    new_requests = (
-        [el for el in current_reader.requests if el.status == RequestStatus.PENDING]
-        + [el for el in current_reader.requests if el.status == RequestStatus.QUEUED]
-        + [el for el in current_reader.requests if el.status == RequestStatus.FULFILLED]
+    async def render():
+        # resolved after the ETag versions are taken
+        current_reader = await OAuth2Utility.get_current_reader(token)
+        new_requests = (
+            [el for el in current_reader.requests if el.status == RequestStatus.PENDING]
+            + [el for el in current_reader.requests if el.status == RequestStatus.QUEUED]
+            + [el for el in current_reader.requests if el.status == RequestStatus.FULFILLED]
+        )
+        current_reader.requests = new_requests
+
+        return Response(current_reader.model_dump_json(), media_type="application/json")
+
+    return await conditional( # type: ignore
+        request, (ReaderORM, ProfileORM, RequestORM, LoanORM, BookCopyORM, BookORM), render
     )
-    current_reader.requests = new_requests
-    
-    return current_reader
 
 
 @reader_router.patch("/me/icon")
 async def set_reader_avatar(
         icon: UploadFile,
-        current_reader: CurrentReaderType,
+        current_reader: CurrentPrincipalType,
         reader_service: ReaderServiceType,
 ) -> ReaderRelationDTO:
     updated_reader = await reader_service.set_icon_to_reader(current_reader.id, icon)
@@ -48,7 +61,7 @@ async def set_reader_avatar(
 @reader_router.post("/me/requests")
 async def make_requests(
         book_id: int,
-        current_reader: CurrentReaderType,
+        current_reader: CurrentPrincipalType,
         request_service: RequestServiceType,
 ) -> RequestSemiRelationDTO:
     requests = await request_service.create_request(
@@ -61,7 +74,7 @@ async def make_requests(
 @reader_router.delete("/me/requests/{request_id}")
 async def remove_request(
         request_id: int,
-        current_reader: CurrentReaderType,
+        current_reader: CurrentPrincipalType,
         request_service: RequestServiceType,
 ) -> RequestDTO:
     request = await request_service.reader_remove_request(request_id, current_reader.id)
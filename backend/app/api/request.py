@@ -1,44 +1,56 @@
 from typing import Annotated, List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.params import Query, Body
 
-from app.api.types import PaginationType, CurrentReaderType, RequestServiceType
+from app.api.routing import UnitOfWorkRoute
+from app.api.types import PaginationType, FieldsType, CurrentPrincipalType, RequestServiceType
+from app.models import BookCopyORM, BookORM, ProfileORM, ReaderORM, RequestORM
 from app.models.types import Role, RequestStatus
 from app.schemas import RequestDTO, MultiDTO
 from app.schemas.relations import RequestRelationDTO
 from app.schemas.utils import Pagination
 from app.schemas.utils.filters import RequestFilter
 from app.utils.errors import Forbidden
+from app.utils.etag import conditional
 
 request_router = APIRouter(
     prefix="/requests",
-    tags=["Requests"]
+    tags=["Requests"],
+    route_class=UnitOfWorkRoute,
 )
 
 
 @request_router.get("")
 async def get_requests(
+        request: Request,
         pagination: PaginationType,
+        fields: FieldsType,
         filters: Annotated[RequestFilter, Depends()],
-        current_reader: CurrentReaderType,
+        current_reader: CurrentPrincipalType,
         request_service: RequestServiceType,
 ) -> MultiDTO[RequestRelationDTO]:
     if current_reader.role == Role.READER:
         raise Forbidden
 
-    requests = await request_service.get_multi(
-        pg=pagination,
-        conditions=filters.conditions
+    async def render():
+        requests = await request_service.get_multi(
+            pg=pagination,
+            conditions=filters.conditions,
+            fields=fields,
+        )
+        return fields.response(requests)
+
+    return await conditional( # type: ignore
+        request, (RequestORM, ReaderORM, ProfileORM, BookORM, BookCopyORM), render
     )
-    return requests
 
 
 @request_router.patch("/{request_id}")
 async def update_request_status(
         request_id: int,
         new_status: RequestStatus,
-        current_reader: CurrentReaderType,
+        current_reader: CurrentPrincipalType,
         request_service: RequestServiceType,
 ):
     if current_reader.role == Role.READER:
@@ -50,7 +62,7 @@ async def update_request_status(
 @request_router.post("/{request_id}/give")
 async def give_book(
     request_id: int,
-    current_reader: CurrentReaderType,
+    current_reader: CurrentPrincipalType,
     request_service: RequestServiceType
 ) -> RequestDTO:
     if current_reader.role == Role.READER:
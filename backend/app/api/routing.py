@@ -0,0 +1,59 @@
+import math
+import time
+from typing import Callable, Coroutine, Any
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import exc
+
+from app.config.database import db, db_config
+from app.utils.errors import CommitFailed
+
+# until when the client's reads go to the primary, set after it writes
+PRIMARY_COOKIE = "read_primary_until"
+
+
+def pinned_to_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class UnitOfWorkRoute(APIRoute):
+    """
+    Runs the endpoint, its dependencies included, in one unit of work that
+    is committed before the response is sent: a client never gets a success
+    for changes that failed to commit, and row locks are released before the
+    response goes out.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def unit_of_work_handler(request: Request) -> Response:
+            # GET handlers read from the replica, unless the client just wrote something
+            read_only = request.method in ("GET", "HEAD") and not pinned_to_primary(request)
+
+            response = None
+            try:
+                async with db.unit_of_work(read_only=read_only) as unit_of_work:
+                    response = await handler(request)
+            except exc.SQLAlchemyError as error:
+                if response is None:
+                    raise
+                raise CommitFailed from error
+
+            if unit_of_work.written_tables and db.replica_engine is not None:
+                pin = db_config.REPLICA_PIN_AFTER_WRITE
+                response.set_cookie(
+                    PRIMARY_COOKIE,
+                    f"{time.time() + pin:.3f}",
+                    max_age=math.ceil(pin),
+                    httponly=True,
+                    samesite="lax",
+                )
+
+            return response
+
+        return unit_of_work_handler
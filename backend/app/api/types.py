@@ -3,13 +3,16 @@ from typing import Annotated
 from fastapi import Depends, Query
 
 from app.deps import Deps
+from app.schemas import ReaderDTO
 from app.schemas.relations import ReaderRelationDTO
-from app.schemas.utils import Pagination
+from app.schemas.utils import Fields, Pagination
 from app.services import RequestService, ReaderService, BookService, LoanService
 from app.utils import OAuth2Utility
 
 PaginationType = Annotated[Pagination, Depends()]
+FieldsType = Annotated[Fields, Depends()]
 CurrentReaderType = Annotated[ReaderRelationDTO, Depends(OAuth2Utility.get_current_reader)]
+CurrentPrincipalType = Annotated[ReaderDTO, Depends(OAuth2Utility.get_current_principal)]
 
 RequestServiceType = Annotated[RequestService, Depends(Deps.request_service)]
 ReaderServiceType = Annotated[ReaderService, Depends(Deps.reader_service)]
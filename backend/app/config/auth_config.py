@@ -4,6 +4,8 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class AuthConfig(BaseSettings):
     JWT_SECRET: str
     JWT_ALGORITHM: str
+    # seconds the resolved reader of a token is reused
+    READER_CACHE_TTL: int = 60
 
     model_config = SettingsConfigDict(
         env_file="../.env",
@@ -1,33 +1,129 @@
-from contextlib import asynccontextmanager
+import inspect
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, Set
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy import exc, make_url, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 
 from app.config.database.db_config import db_config
+from app.config.database.pool import InstrumentedQueuePool
 
+# a replica that replayed everything it received is caught up, however long
+# ago the last transaction was; only a replay backlog is measured in time
+REPLICA_LAG = text(
+    """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() IS NULL
+            OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class UnitOfWork:
+    """
+    Sessions of one unit of work. Reads go to the replica until the first
+    write, after that everything stays on the primary.
+    """
+
+    def __init__(
+            self,
+            session_factory: async_sessionmaker,
+            replica_session_factory: Optional[async_sessionmaker] = None,
+    ):
+        self.session_factory = session_factory
+        self.replica_session_factory = replica_session_factory
+        self.session: Optional[AsyncSession] = None
+        self.replica_session: Optional[AsyncSession] = None
+        self.on_commit: List[Callable[[], Any]] = []
+        self.on_commit_last: List[Callable[[], Any]] = []
+        # tables written so far, see TableVersions
+        self.written_tables: Set[str] = set()
+
+    def get_session(self, write: bool = False) -> AsyncSession:
+        if write or self.session is not None or self.replica_session_factory is None:
+            if self.session is None:
+                self.session = self.session_factory()
+            return self.session
+
+        if self.replica_session is None:
+            self.replica_session = self.replica_session_factory()
+        return self.replica_session
+
+    async def commit(self):
+        if self.session is not None:
+            await self.session.commit()
+
+        for callback in self.on_commit + self.on_commit_last:
+            result = callback()
+            if inspect.isawaitable(result):
+                await result
+
+    async def rollback(self):
+        for session in (self.session, self.replica_session):
+            if session is not None:
+                await session.rollback()
+
+    async def close(self):
+        for session in (self.session, self.replica_session):
+            if session is not None:
+                await session.close()
 
-class Database:
-    def __init__(self, url: str, echo: bool = False):
-        if db_config.SSL:
-            self.engine = create_async_engine(
-                url=url,
-                echo=echo,
-                connect_args={"ssl": True}
-            )
-        else:
-            self.engine = create_async_engine(
-                url=url,
-                echo=echo
-            )
 
+class Database:
+    def __init__(self, url: str, echo: bool = False, replica_url: Optional[str] = None):
+        self.engine = self.create_engine(url, echo, "primary")
         self.session_factory = async_sessionmaker(
             bind=self.engine, expire_on_commit=False, autoflush=False, autocommit=False
         )
 
+        self.replica_engine: Optional[AsyncEngine] = None
+        self.replica_session_factory: Optional[async_sessionmaker] = None
+        if replica_url:
+            self.replica_engine = self.create_engine(replica_url, echo, "replica")
+            self.replica_session_factory = async_sessionmaker(
+                bind=self.replica_engine, expire_on_commit=False, autoflush=False, autocommit=False
+            )
+
+        self._replica_checked_at: float = 0.0
+        self._replica_healthy: bool = True
+        self._unit_of_work: ContextVar[Optional[UnitOfWork]] = ContextVar(
+            "unit_of_work", default=None
+        )
+        self._primary_reads: ContextVar[bool] = ContextVar("primary_reads", default=False)
+
+    @staticmethod
+    def create_engine(url: str, echo: bool, name: str) -> AsyncEngine:
+        connect_args: dict = {"statement_cache_size": db_config.STATEMENT_CACHE_SIZE}
+        if db_config.STATEMENT_TIMEOUT is not None:
+            connect_args["server_settings"] = {"statement_timeout": str(db_config.STATEMENT_TIMEOUT)}
+        if db_config.SSL:
+            connect_args["ssl"] = True
+
+        return create_async_engine(
+            # SQLAlchemy keeps its own prepared statement cache on top of asyncpg's
+            url=make_url(url).update_query_dict(
+                {"prepared_statement_cache_size": str(db_config.STATEMENT_CACHE_SIZE)}
+            ),
+            echo=echo,
+            connect_args=connect_args,
+            poolclass=InstrumentedQueuePool,
+            pool_size=db_config.POOL_SIZE,
+            max_overflow=db_config.POOL_MAX_OVERFLOW,
+            pool_timeout=db_config.POOL_TIMEOUT,
+            pool_recycle=db_config.POOL_RECYCLE,
+            pool_pre_ping=db_config.POOL_PRE_PING,
+            pool_logging_name=name,
+        )
+
     @asynccontextmanager
-    async def get_session(self):
-        from sqlalchemy import exc
+    async def get_session(self, replica: bool = False):
+        factory = self.replica_session_factory if replica and self.replica_session_factory else self.session_factory
 
-        session: AsyncSession = self.session_factory()
+        session: AsyncSession = factory()
         try:
             yield session
         except exc.SQLAlchemyError as error:
@@ -36,5 +132,123 @@ class Database:
         finally:
             await session.close()
 
+    async def replica_available(self) -> bool:
+        """
+        The replica serves reads while it answers and lags behind the primary by
+        no more than REPLICA_MAX_LAG seconds. The check runs at most once per
+        REPLICA_CHECK_INTERVAL seconds.
+        """
+        if self.replica_engine is None:
+            return False
+
+        now = time.monotonic()
+        if now - self._replica_checked_at < db_config.REPLICA_CHECK_INTERVAL:
+            return self._replica_healthy
+
+        self._replica_checked_at = now
+        try:
+            async with self.replica_engine.connect() as connection:
+                lag = (await connection.execute(REPLICA_LAG)).scalar()
+            self._replica_healthy = (
+                db_config.REPLICA_MAX_LAG is None or float(lag) <= db_config.REPLICA_MAX_LAG
+            )
+        except (exc.SQLAlchemyError, OSError):
+            self._replica_healthy = False
+
+        return self._replica_healthy
+
+    @asynccontextmanager
+    async def unit_of_work(self, read_only: bool = False) -> AsyncIterator[UnitOfWork]:
+        """
+        One primary session and one transaction for everything that runs inside
+        the block. Commits once on success, rolls back on any exception.
+        With read_only=True reads are served by the replica when it is available.
+        """
+        unit_of_work = self._unit_of_work.get()
+        if unit_of_work is not None:
+            yield unit_of_work
+            return
+
+        use_replica = read_only and await self.replica_available()
+        unit_of_work = UnitOfWork(
+            self.session_factory,
+            self.replica_session_factory if use_replica else None,
+        )
+
+        token = self._unit_of_work.set(unit_of_work)
+        try:
+            yield unit_of_work
+            await unit_of_work.commit()
+        except BaseException:
+            await unit_of_work.rollback()
+            raise
+        finally:
+            self._unit_of_work.reset(token)
+            await unit_of_work.close()
+
+    @contextmanager
+    def primary_reads(self) -> Iterator[None]:
+        """
+        Reads inside the block go to the primary. For values cached under
+        versions taken before the read: a lagging replica could return data
+        older than those versions.
+        """
+        token = self._primary_reads.set(True)
+        try:
+            yield
+        finally:
+            self._primary_reads.reset(token)
+
+    def current_unit_of_work(self) -> Optional[UnitOfWork]:
+        return self._unit_of_work.get()
+
+    async def after_commit(self, callback: Callable[[], Any], last: bool = False):
+        """
+        Run the callback once the unit of work commits, right away outside of
+        one. Coroutine callbacks are awaited, by the commit or here, `last`
+        ones after all the others.
+        """
+        unit_of_work = self._unit_of_work.get()
+        if unit_of_work is None:
+            result = callback()
+            if inspect.isawaitable(result):
+                await result
+            return
+
+        if last:
+            unit_of_work.on_commit_last.append(callback)
+        else:
+            unit_of_work.on_commit.append(callback)
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        """Session for reads: the unit of work session if active, otherwise a fresh one."""
+        unit_of_work = self._unit_of_work.get()
+        if unit_of_work is not None:
+            yield unit_of_work.get_session(write=self._primary_reads.get())
+            return
+
+        replica = not self._primary_reads.get() and await self.replica_available()
+        async with self.get_session(replica=replica) as session:
+            yield session
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[AsyncSession]:
+        """
+        Session for writes, always on the primary. Inside a unit of work changes
+        are only flushed and committed together at the end of it, otherwise they
+        are committed on exit.
+        """
+        unit_of_work = self._unit_of_work.get()
+        if unit_of_work is not None:
+            session = unit_of_work.get_session(write=True)
+            yield session
+            await session.flush()
+            return
+
+        async with self.get_session() as session:
+            yield session
+            await session.commit()
+
 
-db = Database(url=db_config.database_url, echo=db_config.ECHO)
+db = Database(url=db_config.database_url, echo=db_config.ECHO, replica_url=db_config.replica_url)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,6 +12,30 @@ class ConfigDB(BaseSettings):
     SSL: bool = False
     ECHO: bool
 
+    POSTGRES_REPLICA_HOST: Optional[str] = None
+    POSTGRES_REPLICA_PORT: Optional[str] = None
+    REPLICA_MAX_LAG: Optional[float] = 5.0
+    REPLICA_CHECK_INTERVAL: float = 5.0
+    # seconds a client's reads stay on the primary after it wrote something
+    REPLICA_PIN_AFTER_WRITE: float = 5.0
+
+    POOL_SIZE: int = 5
+    POOL_MAX_OVERFLOW: int = 10
+    POOL_TIMEOUT: float = 30.0
+    POOL_RECYCLE: int = 1800
+    POOL_PRE_PING: bool = True
+    STATEMENT_CACHE_SIZE: int = 100
+
+    # milliseconds, applied to every connection; None keeps the server default
+    STATEMENT_TIMEOUT: Optional[int] = None
+    SLOW_QUERY_THRESHOLD: float = 0.5
+
+    # seconds between checks of the books availability counters, None disables
+    COUNTERS_CHECK_INTERVAL: Optional[float] = 3600
+    COUNTERS_REPAIR: bool = False
+    # seconds between refreshes of the overdue_loans view, None disables
+    OVERDUE_REFRESH_INTERVAL: Optional[float] = 300
+
     @property
     def database_url(self) -> str:
         return (
@@ -17,6 +43,16 @@ class ConfigDB(BaseSettings):
             f"{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    @property
+    def replica_url(self) -> Optional[str]:
+        if not self.POSTGRES_REPLICA_HOST:
+            return None
+
+        return (
+            f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@"
+            f"{self.POSTGRES_REPLICA_HOST}:{self.POSTGRES_REPLICA_PORT or self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        )
+
     model_config = SettingsConfigDict(
         env_file="../.env",
         env_ignore_empty=True,
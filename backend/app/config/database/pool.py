@@ -0,0 +1,41 @@
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+POOL_SIZE = Gauge("db_pool_size", "Configured number of pooled connections", ["pool"])
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", ["pool"])
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open above the pool size", ["pool"])
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_CHECKOUT_FAILURES = Counter(
+    "db_pool_checkout_failures_total", "Connection checkouts that timed out or failed", ["pool"]
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        label = self._orig_logging_name or "primary"
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            POOL_CHECKOUT_FAILURES.labels(label).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.labels(label).observe(time.perf_counter() - started)
+
+
+def instrument_pools(database) -> None:
+    engines = {"primary": database.engine, "replica": database.replica_engine}
+    for label, engine in engines.items():
+        if engine is None:
+            continue
+
+        POOL_SIZE.labels(label).set_function(lambda engine=engine: engine.pool.size())
+        POOL_CHECKED_OUT.labels(label).set_function(lambda engine=engine: engine.pool.checkedout())
+        POOL_OVERFLOW.labels(label).set_function(lambda engine=engine: max(engine.pool.overflow(), 0))
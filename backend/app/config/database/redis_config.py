@@ -8,6 +8,16 @@ class RedisConfig(BaseSettings):
     REDIS_PASSWORD: str
     REDIS_USER_USAGE: bool = False
 
+    # worker-local tier in front of the Redis cache
+    LOCAL_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LOCAL_CACHE_TTL: float = 30.0
+
+    # stampede protection of the response cache, the lock spans workers
+    SINGLE_FLIGHT_LOCK: bool = False
+    SINGLE_FLIGHT_LOCK_TIMEOUT: float = 10.0
+    SINGLE_FLIGHT_WAIT: float = 5.0
+    EARLY_REFRESH_BETA: float = 1.0
+
     model_config = SettingsConfigDict(
         env_file="../.env",
         env_ignore_empty=True,
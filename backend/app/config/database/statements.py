@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+import re
+import sys
+import time
+from functools import lru_cache
+from types import FrameType
+from typing import Optional, Tuple
+
+import greenlet
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.database.db_config import db_config
+
+STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "Time spent executing a statement",
+    ["pool", "fingerprint", "caller"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+STATEMENT_ROWS = Histogram(
+    "db_statement_rows",
+    "Rows returned or affected by a statement",
+    ["pool", "fingerprint", "caller"],
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+
+slow_query_logger = logging.getLogger("app.db.slow_query")
+
+# an asyncpg parameter with the type cast SQLAlchemy renders for it, e.g. $1::TIMESTAMP WITHOUT TIME ZONE
+PARAMETER = r"\$\d+(?:::\w+(?: with(?:out)? time zone| precision| varying)?(?:\[\])*)?"
+PARAMETER_LIST = re.compile(rf"{PARAMETER}(?:\s*,\s*{PARAMETER})*", re.IGNORECASE)
+# a row of a multi-row VALUES, one level of nested parentheses allowed
+ROW = r"\((?:[^()]|\([^()]*\))*\)"
+VALUES_ROWS = re.compile(rf"\b(VALUES {ROW})(?:, {ROW})+", re.IGNORECASE)
+
+SERVICES_PATH = "/app/services/"
+DATABASE_PATH = "/app/config/database/"
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(statement: str) -> Tuple[str, str]:
+    """
+    Short hash of the statement with whitespace, expanded parameter lists and
+    the rows of a multi-row VALUES collapsed.
+    """
+    normalized = re.sub(r"\s+", " ", statement).strip()
+    normalized = PARAMETER_LIST.sub("?", normalized)
+    normalized = VALUES_ROWS.sub(r"\1", normalized)
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12], normalized
+
+
+def find_caller() -> str:
+    """
+    The service method that issued the statement, otherwise the closest frame
+    of the app. With asyncpg the statement runs in a greenlet, so the awaiting
+    coroutines are found in the parent greenlet's stack.
+    """
+    parent = greenlet.getcurrent().parent
+    frame: Optional[FrameType] = parent.gr_frame if parent is not None else sys._getframe(1)
+
+    fallback = "unknown"
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if SERVICES_PATH in filename:
+            return frame.f_code.co_qualname
+        if fallback == "unknown" and "/app/" in filename and DATABASE_PATH not in filename:
+            fallback = frame.f_code.co_qualname
+        frame = frame.f_back
+
+    return fallback
+
+
+def instrument_statements(database) -> None:
+    engines = {"primary": database.engine, "replica": database.replica_engine}
+    for label, engine in engines.items():
+        if engine is not None:
+            listen(engine, label)
+
+
+def listen(engine: AsyncEngine, label: str) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_started", []).append((time.perf_counter(), find_caller()))
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started, caller = conn.info["statement_started"].pop()
+        duration = time.perf_counter() - started
+        rows = max(cursor.rowcount, 0)
+        key, normalized = fingerprint(statement)
+
+        STATEMENT_DURATION.labels(label, key, caller).observe(duration)
+        STATEMENT_ROWS.labels(label, key, caller).observe(rows)
+
+        if duration >= db_config.SLOW_QUERY_THRESHOLD:
+            slow_query_logger.warning(json.dumps({
+                "event": "slow_query",
+                "pool": label,
+                "fingerprint": key,
+                "caller": caller,
+                "duration_ms": round(duration * 1000, 2),
+                "rows": rows,
+                "statement": normalized[:2000],
+            }, ensure_ascii=False))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        started = context.connection.info.get("statement_started") if context.connection else None
+        if started:
+            started.pop()
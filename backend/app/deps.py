@@ -22,7 +22,9 @@ class Deps:
             RF.book_repository(),
             RF.book_copy_repository(),
             RF.request_repository(),
-            RF.history_repository()
+            RF.history_repository(),
+            RF.catalog_import_repository(),
+            RF.waitlist_repository(),
         )
 
     @staticmethod
@@ -38,6 +40,7 @@ class Deps:
     def loan_service() -> LoanService:
         return LoanService(
             RF.loan_repository(),
+            RF.overdue_loan_repository(),
             book_service=Deps.book_service(),
             reader_service=Deps.reader_service(),
         )
@@ -5,6 +5,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import RedirectResponse
 
 from app.config import settings
+from app.config.database import db
+from app.config.database.pool import instrument_pools
+from app.config.database.statements import instrument_statements
 from app.router import get_apps_routes
 from app.utils.admin.sqladmin import get_admin
 from app.utils.cache import lifespan
@@ -41,6 +44,8 @@ async def root() -> RedirectResponse:
     return RedirectResponse(url="/api/docs")
 
 Instrumentator().instrument(app).expose(app)
+instrument_pools(db)
+instrument_statements(db)
 
 if __name__ == "__main__":
     uvicorn.run(
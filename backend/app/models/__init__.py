@@ -5,3 +5,4 @@ from .loan import LoanORM
 from .profile import ProfileORM
 from .reader import ReaderORM
 from .request import RequestORM
+from .overdue_loan import OverdueLoanORM
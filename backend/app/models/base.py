@@ -1,10 +1,5 @@
-from typing import List, Set, Type, TypeVar, Any, Union
+from sqlalchemy.orm import DeclarativeBase
 
-from sqlalchemy import inspect
-from sqlalchemy.orm import DeclarativeBase, selectinload
-from sqlalchemy.orm.interfaces import LoaderOption
-
-ModelType = TypeVar('ModelType')
 
 class Base(DeclarativeBase):
     __abstract__ = True
@@ -19,27 +14,3 @@ class Base(DeclarativeBase):
                 cols.append(f"{col}={getattr(self, col)}")
 
         return f"<{self.__class__.__name__} {", ".join(cols)}>"
-
-    @classmethod
-    def get_loads(cls: Type[ModelType], visited: Union[Set[Type], None] = None) -> List[LoaderOption]:
-        if visited is None:
-            visited = set()
-
-        if cls in visited:
-            return []
-
-        visited.add(cls)
-
-        loads = []
-        mapper: Any = inspect(cls)
-
-        for rel in mapper.relationships:
-            attr = getattr(cls, rel.key)
-
-            nested_loads = rel.mapper.class_.get_loads(visited)
-            if nested_loads:
-                loads.append(selectinload(attr).options(*nested_loads))
-            else:
-                loads.append(selectinload(attr))
-
-        return loads
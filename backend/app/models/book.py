@@ -15,6 +15,12 @@ class BookORM(Base):
     cover_url: Mapped[Optional[str]]
     year_publication: Mapped[int]
 
+    # maintained by triggers on book_copies and requests
+    available_count: Mapped[int] = mapped_column(server_default="0", index=True)
+    reserved_count: Mapped[int] = mapped_column(server_default="0")
+    borrowed_count: Mapped[int] = mapped_column(server_default="0")
+    queue_length: Mapped[int] = mapped_column(server_default="0")
+
     copies: Mapped[list["BookCopyORM"]] = relationship( # type: ignore
         "BookCopyORM",
         back_populates="book",
@@ -1,6 +1,6 @@
 from datetime import date
 from typing import Optional
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import ForeignKey, Index, func
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 
 from app.models import Base
@@ -9,6 +9,9 @@ from app.models.types import BookCopyStatus, BookAccessType
 
 class BookCopyORM(Base):
     __tablename__ = "book_copies"
+    __table_args__ = (
+        Index("ix_book_copies_book_id_status", "book_id", "status"),
+    )
 
     serial_num: Mapped[str] = mapped_column(primary_key=True)
     book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"))
@@ -29,7 +32,7 @@ class HistoryORM(Base):
     __tablename__ = "histories"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    copy_id: Mapped[str] = mapped_column(ForeignKey("book_copies.serial_num"))
+    copy_id: Mapped[str] = mapped_column(ForeignKey("book_copies.serial_num"), index=True)
     name: Mapped[str]
     borrowed_at: Mapped[date] = mapped_column(server_default=func.now())
     borrowed_to: Mapped[Optional[date]]
@@ -11,10 +11,10 @@ class LoanORM(Base):
     __tablename__ = 'loans'
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    reader_id: Mapped[int] = mapped_column(ForeignKey('readers.id'))
-    copy_id: Mapped[str] = mapped_column(ForeignKey('book_copies.serial_num', ondelete="CASCADE"))
+    reader_id: Mapped[int] = mapped_column(ForeignKey('readers.id'), index=True)
+    copy_id: Mapped[str] = mapped_column(ForeignKey('book_copies.serial_num', ondelete="CASCADE"), index=True)
     issue_date: Mapped[datetime] = mapped_column(default=datetime.now())
-    due_date: Mapped[datetime] = mapped_column(default=datetime.now() + timedelta(days=14))
+    due_date: Mapped[datetime] = mapped_column(default=datetime.now() + timedelta(days=14), index=True)
     return_date: Mapped[Optional[datetime]]
 
     reader: Mapped["ReaderORM"] = relationship( # type: ignore
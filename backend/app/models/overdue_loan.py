@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models import Base
+
+
+class OverdueLoanORM(Base):
+    """
+    Open loans past their due date, a materialized view refreshed by the
+    refresh_overdue_loans job and after every returned loan.
+    """
+    __tablename__ = "overdue_loans"
+    __table_args__ = {"info": {"is_view": True}}
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    reader_id: Mapped[int]
+    reader_name: Mapped[str]
+    reader_email: Mapped[str]
+    copy_id: Mapped[str]
+    book_id: Mapped[int]
+    book_title: Mapped[str]
+    issue_date: Mapped[datetime]
+    due_date: Mapped[datetime] = mapped_column(index=True)
+    days_overdue: Mapped[int]
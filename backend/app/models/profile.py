@@ -18,3 +18,9 @@ class ProfileORM(Base):
         back_populates="profile",
         uselist=False,
     )
+
+    @property
+    def first_name(self) -> str:
+        # "Surname Name Patronymic"; a name of one word is all there is
+        parts = self.full_name.split()
+        return parts[1] if len(parts) > 1 else self.full_name
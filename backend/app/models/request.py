@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import func, ForeignKey
+from sqlalchemy import func, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.types import RequestStatus
@@ -9,9 +9,12 @@ from .base import Base
 
 class RequestORM(Base):
     __tablename__ = 'requests'
+    __table_args__ = (
+        Index("ix_requests_book_id_status_created_at", "book_id", "status", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    reader_id: Mapped[int] = mapped_column(ForeignKey('readers.id'))
+    reader_id: Mapped[int] = mapped_column(ForeignKey('readers.id'), index=True)
     book_id: Mapped[int] = mapped_column(ForeignKey('books.id', ondelete="CASCADE"))
     status: Mapped[RequestStatus] = mapped_column(default=RequestStatus.PENDING)
 
@@ -1 +1 @@
-from .email_sender import send_notification_email, send_verify_email
+from .email_sender import send_after_commit, send_notification_email, send_verify_email
@@ -1,10 +1,12 @@
 import asyncio
 import smtplib
 from email.message import EmailMessage
+from typing import Awaitable, Callable, Set
 
 from jinja2 import Environment, FileSystemLoader
 
 from app.config import email_config
+from app.config.database import db
 
 env = Environment(loader=FileSystemLoader("app/modules/email/templates"))
 
@@ -21,6 +23,22 @@ def send_email(to, subject, html):
         smtp.send_message(msg)
 
 
+_background_tasks: Set[asyncio.Task] = set()
+
+
+async def send_after_commit(send: Callable[..., Awaitable[bool]], **kwargs):
+    """
+    Send in the background once the current unit of work commits, so SMTP
+    never holds up the request and nothing is sent for a rolled back one.
+    """
+    def start():
+        task = asyncio.ensure_future(send(**kwargs))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    await db.after_commit(start)
+
+
 async def send_notification_email(to: str, book_title: str) -> bool:
     try:
         template = env.get_template("book_notification.html")
@@ -1,3 +1,4 @@
 from .base import AbstractRepository as AbstractRepository
+from .load_plan import LoadPlan as LoadPlan, LoadPlans as LoadPlans
 from .factory import RepositoryFactory as RepositoryFactory
 from .sqlalchemy import SqlAlchemyRepository as SqlAlchemyRepository
@@ -12,6 +12,10 @@ class AbstractRepository(ABC):
     async def create_multiple(self, data: List[dict]):
         raise NotImplementedError
 
+    @abstractmethod
+    async def copy_multiple(self, data: List[dict]):
+        raise NotImplementedError
+
     @abstractmethod
     async def update(self, **kwargs):
         raise NotImplementedError
@@ -0,0 +1,79 @@
+from typing import List, Sequence
+
+from sqlalchemy import Row, text
+
+from app.config.database import db
+from app.models import BookORM
+from app.repositories.table_versions import table_versions
+
+# counters of every book next to the ones recounted from copies and requests
+ACTUAL_COUNTERS = """
+    SELECT b.id,
+        b.available_count, b.reserved_count, b.borrowed_count, b.queue_length,
+        coalesce(c.available, 0) AS available,
+        coalesce(c.reserved, 0) AS reserved,
+        coalesce(c.borrowed, 0) AS borrowed,
+        coalesce(r.queued, 0) AS queued
+    FROM books b
+    LEFT JOIN LATERAL (
+        SELECT count(*) FILTER (WHERE status = 'AVAILABLE') AS available,
+               count(*) FILTER (WHERE status = 'RESERVED') AS reserved,
+               count(*) FILTER (WHERE status = 'BORROWED') AS borrowed
+        FROM book_copies WHERE book_id = b.id
+    ) c ON true
+    LEFT JOIN LATERAL (
+        SELECT count(*) AS queued
+        FROM requests WHERE book_id = b.id AND status = 'QUEUED'
+    ) r ON true
+"""
+
+FIND_DRIFT = text(
+    f"""
+    SELECT * FROM ({ACTUAL_COUNTERS}) counters
+    WHERE (available_count, reserved_count, borrowed_count, queue_length)
+        IS DISTINCT FROM (available, reserved, borrowed, queued)
+    ORDER BY id
+    LIMIT :limit
+    """
+)
+
+LOCK_BOOKS = text(
+    "SELECT id FROM books WHERE id = ANY(:ids) ORDER BY id FOR UPDATE"
+)
+
+# runs after the rows are locked, so a concurrent trigger either committed
+# before the recount or applies its delta on top of it
+REPAIR = text(
+    f"""
+    UPDATE books SET
+        available_count = counters.available,
+        reserved_count = counters.reserved,
+        borrowed_count = counters.borrowed,
+        queue_length = counters.queued
+    FROM ({ACTUAL_COUNTERS} WHERE b.id = ANY(:ids)) counters
+    WHERE books.id = counters.id
+    RETURNING books.id
+    """
+)
+
+
+class BookCountersRepository:
+    """
+    Checks the availability counters of books, kept by triggers on
+    book_copies and requests, against the rows they summarize.
+    """
+
+    async def find_drift(self, limit: int = 100) -> Sequence[Row]:
+        async with db.session() as session:
+            result = await session.execute(FIND_DRIFT, {"limit": limit})
+            return result.all()
+
+    async def repair(self, ids: List[int]) -> List[int]:
+        async with db.transaction() as session:
+            await session.execute(LOCK_BOOKS, {"ids": ids})
+            result = await session.execute(REPAIR, {"ids": ids})
+            repaired = list(result.scalars())
+
+        await table_versions.bump_on_commit(BookORM.__tablename__)
+
+        return repaired
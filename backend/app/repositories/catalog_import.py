@@ -0,0 +1,115 @@
+from typing import AsyncIterator, List, Tuple
+
+from sqlalchemy import text
+
+from app.config.database import db
+from app.models import BookORM, BookCopyORM
+from app.repositories.table_versions import table_versions
+
+BookRecord = Tuple[int, str, str, str, int]
+CopyRecord = Tuple[int, str, str]
+
+CREATE_STAGING = (
+    """
+    CREATE TEMP TABLE books_import (
+        row_num integer PRIMARY KEY,
+        id integer NOT NULL DEFAULT nextval(pg_get_serial_sequence('books', 'id')::regclass),
+        title text NOT NULL,
+        author text NOT NULL,
+        publisher text NOT NULL,
+        year_publication integer NOT NULL
+    ) ON COMMIT DROP
+    """,
+    """
+    CREATE TEMP TABLE book_copies_import (
+        row_num integer NOT NULL,
+        serial_num text NOT NULL,
+        access_type text NOT NULL
+    ) ON COMMIT DROP
+    """,
+)
+
+# a row is rejected as a whole if any of its copies clashes with an existing
+# serial number or repeats one already used earlier in the file
+REJECT_CONFLICTS = text(
+    """
+    WITH numbered AS (
+        SELECT row_num, serial_num,
+               row_number() OVER (PARTITION BY serial_num ORDER BY row_num) AS n
+        FROM book_copies_import
+    ), conflicts AS (
+        SELECT row_num, serial_num
+        FROM numbered
+        WHERE n > 1
+           OR EXISTS (SELECT 1 FROM book_copies bc WHERE bc.serial_num = numbered.serial_num)
+    ), removed AS (
+        DELETE FROM books_import
+        WHERE row_num IN (SELECT row_num FROM conflicts)
+        RETURNING row_num
+    )
+    SELECT row_num, min(serial_num) AS serial_num, count(*) OVER () AS total
+    FROM conflicts
+    GROUP BY row_num
+    ORDER BY row_num
+    LIMIT :limit
+    """
+)
+
+MERGE_BOOKS = text(
+    """
+    INSERT INTO books (id, title, author, publisher, year_publication)
+    SELECT id, title, author, publisher, year_publication
+    FROM books_import
+    ORDER BY row_num
+    """
+)
+
+MERGE_COPIES = text(
+    """
+    INSERT INTO book_copies (serial_num, book_id, status, access_type)
+    SELECT c.serial_num, b.id, 'AVAILABLE'::bookcopystatus, c.access_type::bookaccesstype
+    FROM book_copies_import c
+    JOIN books_import b USING (row_num)
+    """
+)
+
+
+class CatalogImportRepository:
+    async def import_books(
+            self,
+            batches: AsyncIterator[Tuple[List[BookRecord], List[CopyRecord]]],
+            max_conflicts: int = 1000,
+    ) -> Tuple[int, int, int, List[Tuple[int, str]]]:
+        """
+        COPY every batch into temporary staging tables, then merge them into
+        books and book_copies with two INSERT ... SELECT statements.
+        """
+        async with db.transaction() as session:
+            connection = await session.connection()
+            for statement in CREATE_STAGING:
+                await connection.execute(text(statement))
+
+            raw_connection = (await connection.get_raw_connection()).driver_connection
+            async for books, copies in batches:
+                if books:
+                    await raw_connection.copy_records_to_table( # type: ignore
+                        "books_import",
+                        records=books,
+                        columns=["row_num", "title", "author", "publisher", "year_publication"],
+                    )
+                if copies:
+                    await raw_connection.copy_records_to_table( # type: ignore
+                        "book_copies_import",
+                        records=copies,
+                        columns=["row_num", "serial_num", "access_type"],
+                    )
+
+            conflicts = (await connection.execute(REJECT_CONFLICTS, {"limit": max_conflicts})).all()
+            rejected = conflicts[0].total if conflicts else 0
+
+            books_count = (await connection.execute(MERGE_BOOKS)).rowcount
+            copies_count = (await connection.execute(MERGE_COPIES)).rowcount
+
+        await table_versions.bump_on_commit(BookORM.__tablename__, BookCopyORM.__tablename__)
+
+        return books_count, copies_count, rejected, [(row.row_num, row.serial_num) for row in conflicts]
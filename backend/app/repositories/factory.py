@@ -1,7 +1,11 @@
 from typing import TypeVar
 
 from app.models import ReaderORM, BookORM, BookCopyORM, LoanORM, RequestORM, ProfileORM, HistoryORM
+from app.repositories.book_counters import BookCountersRepository
+from app.repositories.catalog_import import CatalogImportRepository
+from app.repositories.overdue_loans import OverdueLoanRepository
 from app.repositories.sqlalchemy import SqlAlchemyRepository
+from app.repositories.waitlist import WaitlistRepository
 
 
 class RepositoryFactory:
@@ -22,6 +26,10 @@ class RepositoryFactory:
     def loan_repository() -> SqlAlchemyRepository:
         return SqlAlchemyRepository[LoanORM](LoanORM)
 
+    @staticmethod
+    def overdue_loan_repository() -> OverdueLoanRepository:
+        return OverdueLoanRepository()
+
     @staticmethod
     def request_repository() -> SqlAlchemyRepository:
         return SqlAlchemyRepository[RequestORM](RequestORM)
@@ -33,3 +41,15 @@ class RepositoryFactory:
     @staticmethod
     def history_repository() -> SqlAlchemyRepository:
         return SqlAlchemyRepository[HistoryORM](HistoryORM)
+
+    @staticmethod
+    def catalog_import_repository() -> CatalogImportRepository:
+        return CatalogImportRepository()
+
+    @staticmethod
+    def waitlist_repository() -> WaitlistRepository:
+        return WaitlistRepository()
+
+    @staticmethod
+    def book_counters_repository() -> BookCountersRepository:
+        return BookCountersRepository()
@@ -0,0 +1,74 @@
+from typing import Any, Dict, FrozenSet, Optional, Type
+
+from pydantic import BaseModel
+from sqlalchemy import FromClause, Text, ColumnElement, func, inspect, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import ColumnProperty
+
+from app.repositories.load_plan import LoadPlan
+
+
+class JsonProjection:
+    """
+    The JSON of a DTO built by Postgres: json_build_object() for the row and
+    a correlated json_agg() subquery for every nested collection, in the
+    field order of the DTO.
+    """
+
+    _projections: Dict[LoadPlan, "JsonProjection"] = {}
+
+    def __init__(self, model: Type[Any], schema: Type[BaseModel], fields: Optional[FrozenSet[str]] = None):
+        self.model = model
+        self.expression: ColumnElement = self.build(
+            inspect(model), model.__table__, schema, fields
+        ).cast(Text).label("json")
+
+    @classmethod
+    def for_plan(cls, plan: LoadPlan) -> "JsonProjection":
+        projection = cls._projections.get(plan)
+        if projection is None:
+            projection = cls(plan.model, plan.schema, plan.fields) # type: ignore
+            cls._projections[plan] = projection
+
+        return projection
+
+    @classmethod
+    def build(
+            cls,
+            mapper: Any,
+            table: FromClause,
+            schema: Type[BaseModel],
+            fields: Optional[FrozenSet[str]] = None,
+    ) -> ColumnElement:
+        arguments = []
+        for name, field in schema.model_fields.items():
+            if fields is not None and name not in fields:
+                continue
+
+            prop = mapper.attrs.get(name)
+            if prop is None:
+                continue
+
+            if isinstance(prop, ColumnProperty):
+                value = table.c[prop.columns[0].key]
+            else:
+                nested_schema = LoadPlan._unwrap_schema(field.annotation)
+                if nested_schema is None:
+                    continue
+
+                child = prop.mapper.local_table.alias()
+                (local, remote), = prop.local_remote_pairs
+                nested = cls.build(prop.mapper, child, nested_schema)
+                condition = child.c[remote.key] == table.c[local.key]
+
+                if prop.uselist:
+                    order_by = [child.c[column.key] for column in prop.mapper.primary_key]
+                    value = select(func.coalesce(
+                        func.json_agg(aggregate_order_by(nested, *order_by)), func.json_build_array()
+                    )).where(condition).scalar_subquery()
+                else:
+                    value = select(nested).where(condition).limit(1).scalar_subquery()
+
+            arguments.extend((literal_column(f"'{name}'"), value))
+
+        return func.json_build_object(*arguments)
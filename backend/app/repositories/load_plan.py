@@ -0,0 +1,132 @@
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple, Type, get_args
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from app.models import Base, BookORM, LoanORM, OverdueLoanORM, ReaderORM, RequestORM
+from app.schemas import BookDTO, OverdueLoanDTO, ReaderDTO
+from app.schemas.relations import (
+    BookRelationDTO,
+    LoanRelationDTO,
+    ReaderRelationDTO,
+    ReaderSemiRelationDTO,
+    RequestRelationDTO,
+    RequestSemiRelationDTO,
+)
+
+
+class LoadPlan:
+    """
+    Loader options for exactly the relationships a DTO reads.
+    A plan without a schema loads no relationships at all.
+    A projected plan also loads only the columns the DTO reads, optionally
+    narrowed to some of its top-level fields.
+    """
+
+    def __init__(
+            self,
+            model: Optional[Type[Base]] = None,
+            schema: Optional[Type[BaseModel]] = None,
+            fields: Optional[FrozenSet[str]] = None,
+            project: bool = False,
+            keep: Tuple[str, ...] = (),
+    ):
+        self.model = model
+        self.schema = schema
+        self.fields = fields
+        self.project = project
+        self.keep = keep
+        self.options: Tuple[LoaderOption, ...] = (
+            tuple(self.build(model, schema, fields, project, keep)) if model and schema else ()
+        )
+        self._projections: Dict[Tuple[Optional[FrozenSet[str]], Tuple[str, ...]], LoadPlan] = {}
+
+    def __repr__(self):
+        schema = self.schema.__name__ if self.schema else None
+        return f"<LoadPlan {schema}>"
+
+    def projection(self, fields: Optional[Iterable[str]] = None, *keep: Optional[str]) -> "LoadPlan":
+        """
+        Projected copy of the plan. `keep` columns are loaded even if the DTO
+        does not read them (e.g. the sort key for the next cursor).
+        Copies are memoized, so they can be part of statement cache keys.
+        """
+        key = (
+            frozenset(fields) if fields is not None else None,
+            tuple(sorted(filter(None, keep))),
+        )
+        plan = self._projections.get(key)
+        if plan is None:
+            plan = LoadPlan(self.model, self.schema, key[0], project=True, keep=key[1])
+            self._projections[key] = plan
+
+        return plan
+
+    @classmethod
+    def build(
+            cls,
+            model: Type[Base],
+            schema: Type[BaseModel],
+            fields: Optional[FrozenSet[str]] = None,
+            project: bool = False,
+            keep: Iterable[str] = (),
+    ) -> List[LoaderOption]:
+        loads = []
+        mapper: Any = inspect(model)
+        relationships: Any = mapper.relationships
+        names = set(schema.model_fields) if fields is None else set(fields)
+        columns = names | set(keep)
+
+        for name, field in schema.model_fields.items():
+            rel = relationships.get(name)
+            if rel is None or name not in names:
+                continue
+
+            attr = getattr(model, name)
+            # many-to-one rows ride along in the same SELECT, collections get one extra query
+            loader = selectinload(attr) if rel.uselist else joinedload(attr)
+            columns.update(mapper.get_property_by_column(column).key for column in rel.local_columns)
+
+            nested_schema = cls._unwrap_schema(field.annotation)
+            nested_loads = cls.build(rel.mapper.class_, nested_schema, project=project) if nested_schema else []
+            loads.append(loader.options(*nested_loads) if nested_loads else loader)
+
+        if project:
+            loads.insert(0, load_only(*(
+                getattr(model, prop.key)
+                for prop in mapper.column_attrs
+                if prop.key in columns or any(column.primary_key for column in prop.columns)
+            )))
+
+        return loads
+
+    @classmethod
+    def _unwrap_schema(cls, annotation: Any) -> Optional[Type[BaseModel]]:
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return annotation
+
+        for arg in get_args(annotation):
+            schema = cls._unwrap_schema(arg)
+            if schema is not None:
+                return schema
+
+        return None
+
+
+class LoadPlans:
+    NONE = LoadPlan()
+
+    BOOK = LoadPlan(BookORM, BookDTO)
+    BOOK_RELATION = LoadPlan(BookORM, BookRelationDTO)
+
+    READER = LoadPlan(ReaderORM, ReaderDTO)
+    READER_SEMI_RELATION = LoadPlan(ReaderORM, ReaderSemiRelationDTO)
+    READER_RELATION = LoadPlan(ReaderORM, ReaderRelationDTO)
+
+    REQUEST_SEMI_RELATION = LoadPlan(RequestORM, RequestSemiRelationDTO)
+    REQUEST_RELATION = LoadPlan(RequestORM, RequestRelationDTO)
+
+    LOAN_RELATION = LoadPlan(LoanORM, LoanRelationDTO)
+    OVERDUE_LOAN = LoadPlan(OverdueLoanORM, OverdueLoanDTO)
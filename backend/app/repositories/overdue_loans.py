@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import ClauseElement, select, text
+
+from app.config.database import db
+from app.models import LoanORM, OverdueLoanORM
+from app.repositories.load_plan import LoadPlan
+from app.repositories.sqlalchemy import SqlAlchemyRepository
+from app.repositories.table_versions import table_versions
+from app.schemas.utils import Pagination
+
+logger = logging.getLogger(__name__)
+
+REFRESH = text("REFRESH MATERIALIZED VIEW CONCURRENTLY overdue_loans")
+# held by the worker refreshing the view until its refresh commits
+TRY_REFRESH_LOCK = text("SELECT pg_try_advisory_xact_lock(hashtext('refresh overdue_loans'))")
+
+# loans returned since the last refresh are still in the view
+NOT_RETURNED = (
+    select(LoanORM.id)
+    .where(LoanORM.id == OverdueLoanORM.id, LoanORM.return_date.is_(None))
+    .exists()
+)
+
+
+class OverdueLoanRepository(SqlAlchemyRepository[OverdueLoanORM]):
+    """
+    Reads of the overdue_loans materialized view. Refreshes requested while
+    one runs are coalesced into a single next refresh, and a worker skips
+    its refresh while another worker's is running.
+    """
+
+    refreshing: Optional[asyncio.Task] = None
+    requested: bool = False
+
+    def __init__(self):
+        super().__init__(OverdueLoanORM)
+
+    async def find_open(
+            self,
+            plan: LoadPlan,
+            pg: Pagination | None = None,
+            conditions: List[ClauseElement] | None = None,
+    ) -> Tuple[List[Dict[str, Any]], int | None]:
+        return await self.find_all_rows(
+            plan, pg=pg, conditions=[NOT_RETURNED, *(conditions or [])]
+        )
+
+    async def refresh(self) -> bool:
+        """Refresh the view, False if another worker was refreshing it."""
+        # never inside a unit of work: the view is rebuilt from committed rows
+        async with db.get_session() as session:
+            if not (await session.execute(TRY_REFRESH_LOCK)).scalar():
+                await session.rollback()
+                return False
+
+            await session.execute(REFRESH)
+            await session.commit()
+
+        await table_versions.bump(OverdueLoanORM.__tablename__)
+        return True
+
+    def request_refresh(self):
+        cls = type(self)
+        cls.requested = True
+        if cls.refreshing is None or cls.refreshing.done():
+            cls.refreshing = asyncio.ensure_future(self.refresh_requested())
+
+    async def refresh_requested(self):
+        cls = type(self)
+        while cls.requested:
+            cls.requested = False
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Refresh of overdue_loans failed")
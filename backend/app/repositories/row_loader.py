@@ -0,0 +1,114 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import Column, Label, Select, any_, bindparam, inspect, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.load_plan import LoadPlan
+
+
+class RowRelation:
+    def __init__(self, name: str, local_key: str, remote: Column, uselist: bool, loader: "RowLoader"):
+        self.name = name
+        self.local_key = local_key
+        self.uselist = uselist
+        self.loader = loader
+        self.query: Select = (
+            select(*loader.columns, remote.label("_parent_key"))
+            .where(remote == any_(bindparam("keys", type_=ARRAY(remote.type))))
+            .order_by(*inspect(loader.model).primary_key)
+        )
+
+
+class RowLoader:
+    """
+    Reads the shape of a load plan with plain Core selects: the rows first,
+    then one query per relationship with all parent keys, like selectinload.
+    Rows stay dicts, no ORM objects or identity map are involved.
+    """
+
+    _loaders: Dict[LoadPlan, "RowLoader"] = {}
+
+    def __init__(
+            self,
+            model: Type[Any],
+            schema: Type[BaseModel],
+            fields: Optional[frozenset] = None,
+            keep: Tuple[str, ...] = (),
+    ):
+        self.model = model
+        mapper: Any = inspect(model)
+        names = set(schema.model_fields) if fields is None else set(fields)
+        keys = names | set(keep)
+
+        self.relations: List[RowRelation] = []
+        for name, field in schema.model_fields.items():
+            rel = mapper.relationships.get(name)
+            if rel is None or name not in names:
+                continue
+
+            nested_schema = LoadPlan._unwrap_schema(field.annotation)
+            if nested_schema is None:
+                continue
+
+            (local, remote), = rel.local_remote_pairs
+            local_key = mapper.get_property_by_column(local).key
+            keys.add(local_key)
+            self.relations.append(RowRelation(
+                name, local_key, remote, rel.uselist, RowLoader(rel.mapper.class_, nested_schema)
+            ))
+
+        self.columns: List[Label] = [
+            prop.columns[0].label(prop.key)
+            for prop in mapper.column_attrs
+            if prop.key in keys or any(column.primary_key for column in prop.columns)
+        ]
+
+    @classmethod
+    def for_plan(cls, plan: LoadPlan) -> "RowLoader":
+        loader = cls._loaders.get(plan)
+        if loader is None:
+            loader = cls(plan.model, plan.schema, plan.fields, plan.keep) # type: ignore
+            cls._loaders[plan] = loader
+
+        return loader
+
+    async def load(self, session: AsyncSession, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for relation in self.relations:
+            keys = list({row[relation.local_key] for row in rows if row[relation.local_key] is not None})
+            children: Dict[Any, List[Dict[str, Any]]] = {}
+            if keys:
+                result = await session.execute(relation.query, {"keys": keys})
+                nested = [dict(row) for row in result.mappings()]
+                await relation.loader.load(session, nested)
+                for child in nested:
+                    children.setdefault(child.pop("_parent_key"), []).append(child)
+
+            for row in rows:
+                found = children.get(row[relation.local_key], [])
+                row[relation.name] = found if relation.uselist else (found[0] if found else None)
+
+        return rows
+
+    @classmethod
+    def construct[T: BaseModel](cls, schema: Type[T], row: Dict[str, Any]) -> T:
+        """Trusted constructor: the row comes from the database, so nothing is validated."""
+        for name, nested_schema in cls.nested_fields(schema):
+            value = row.get(name)
+            if isinstance(value, list):
+                row[name] = [cls.construct(nested_schema, item) for item in value]
+            elif value is not None:
+                row[name] = cls.construct(nested_schema, value)
+
+        return schema.model_construct(**row)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def nested_fields(schema: Type[BaseModel]) -> Tuple[Tuple[str, Type[BaseModel]], ...]:
+        return tuple(
+            (name, nested_schema)
+            for name, field in schema.model_fields.items()
+            if (nested_schema := LoadPlan._unwrap_schema(field.annotation)) is not None
+        )
@@ -1,40 +1,93 @@
-from typing import List, Type, Tuple, TypeVar
+import hashlib
+import json
+from enum import Enum
+from typing import Callable, List, Sequence, Type, Tuple, TypeVar
 
-from sqlalchemy import update, delete, select, func, ClauseElement
+from fastapi import HTTPException
+from fastapi_cache import FastAPICache
+from redis import RedisError
+from sqlalchemy import (
+    update, delete, insert, select, func, inspect, tuple_, bindparam, or_,
+    ClauseElement, Column, ColumnElement, Integer, Row, Select,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
 
 from app.config.database import db
 from app.models import Base
 from app.repositories import AbstractRepository
-from app.schemas.utils import Pagination
+from app.repositories.explain import Explain
+from app.repositories.json_projection import JsonProjection
+from app.repositories.load_plan import LoadPlan, LoadPlans
+from app.repositories.row_loader import RowLoader
+from app.repositories.statement_cache import StatementCache
+from app.repositories.table_versions import cache_backend, table_versions
+from app.schemas.utils import Pagination, CountStrategy
 
 
 ModelType = TypeVar('ModelType', bound=Base)
 
 
 class SqlAlchemyRepository[ModelType](AbstractRepository):
+    statements: StatementCache = StatementCache()
+    # seconds a CACHED total is kept
+    count_expire: int = 5 * 60
+
     def __init__(self, model: Type[ModelType]):
         self.model: Type = model
 
     async def create(self, data: dict) -> ModelType:
-        async with db.get_session() as session:
+        async with db.transaction() as session:
             model = self.model(**data)
             session.add(model)
-            await session.commit()
+            await session.flush()
             await session.refresh(model)
 
-            return model
+        await self.invalidate()
+        return model
+
+    async def create_multiple(self, data: List[dict]) -> Sequence[Row]:
+        if not data:
+            return []
 
-    async def create_multiple(self, data: List[dict]) -> List[ModelType]:
-        async with db.get_session() as session:
-            list_models: list[ModelType] = []
-            for row in data:
-                model = self.model(**row)
-                list_models.append(model)
+        table = self.model.__table__
+        async with db.transaction() as session:
+            # core insert: batched multi-row VALUES ... RETURNING, no ORM objects are built
+            stmt = insert(table).returning(*table.columns, sort_by_parameter_order=True)
+            result = await session.execute(stmt, data)
+            rows = result.all()
 
-            session.add_all(list_models)
-            await session.commit()
+        await self.invalidate()
+        return rows
 
-            return list_models
+    async def copy_multiple(self, data: List[dict]) -> int:
+        if not data:
+            return 0
+
+        table = self.model.__table__
+        columns = [
+            column for column in table.columns
+            if column.key in data[0] or (column.default is not None and column.default.is_scalar)
+        ]
+        records = [
+            tuple(
+                self.to_copy_value(row[column.key] if column.key in row else column.default.arg)
+                for column in columns
+            )
+            for row in data
+        ]
+
+        async with db.transaction() as session:
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table( # type: ignore
+                table.name,
+                records=records,
+                columns=[column.name for column in columns],
+            )
+
+        await self.invalidate()
+        return len(records)
 
     async def update(
             self,
@@ -42,7 +95,7 @@ class SqlAlchemyRepository[ModelType](AbstractRepository):
             conditions: List[ClauseElement] | None = None,
             **filters
     ) -> ModelType:
-        async with db.get_session() as session:
+        async with db.transaction() as session:
             stmt = (
                 update(self.model)   
                 .where(*(conditions or [])) # type: ignore
@@ -52,15 +105,16 @@ class SqlAlchemyRepository[ModelType](AbstractRepository):
             )
 
             result = await session.execute(stmt)
-            await session.commit()
+            model = result.scalar_one_or_none()
 
-            return result.scalar_one_or_none() # type: ignore
+        await self.invalidate()
+        return model # type: ignore
 
     async def delete(self,
         conditions: List[ClauseElement] | None = None,
         **filters
     ) -> ModelType:
-        async with db.get_session() as session:
+        async with db.transaction() as session:
             stmt = (
                 delete(self.model)
                 .where(*(conditions or [])) # type: ignore
@@ -69,51 +123,338 @@ class SqlAlchemyRepository[ModelType](AbstractRepository):
             )
 
             result = await session.execute(stmt)
-            await session.commit()
+            model = result.scalar_one_or_none()
 
-            return result.scalar_one_or_none() # type: ignore
+        await self.invalidate()
+        return model # type: ignore
 
-    async def find(
+    async def claim(
             self,
+            data: dict,
+            order_by: Sequence[ColumnElement] = (),
             conditions: List[ClauseElement] | None = None,
             **filters
-    ) -> ModelType:
-        async with db.get_session() as session:
-            query = (
-                select(self.model)
+    ) -> ModelType | None:
+        """
+        Update the first matching row that no other transaction has locked, in
+        one statement. Concurrent callers never get the same row.
+        """
+        pk_column = inspect(self.model).primary_key[0]
+        target = (
+            select(pk_column)
+            .where(*(conditions or [])) # type: ignore
+            .filter_by(**filters)
+            .order_by(*order_by)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+
+        async with db.transaction() as session:
+            stmt = (
+                update(self.model)
+                .where(pk_column == target)
+                .values(**data)
+                .returning(self.model)
+            )
+
+            result = await session.execute(stmt)
+            model = result.scalar_one_or_none()
+
+        if model is not None:
+            await self.invalidate()
+        return model
+
+    async def lock(self, **filters) -> bool:
+        """Lock the matching row until the end of the transaction, False if there is none."""
+        pk_column = inspect(self.model).primary_key[0]
+
+        async with db.transaction() as session:
+            stmt = select(pk_column).filter_by(**filters).with_for_update()
+            return (await session.execute(stmt)).first() is not None
+
+    async def count_by(self, conditions: List[ClauseElement] | None = None, **filters) -> int:
+        async with db.session() as session:
+            stmt = (
+                select(func.count())
+                .select_from(self.model)
                 .where(*(conditions or [])) # type: ignore
-                .options(*self.model.get_loads())
                 .filter_by(**filters)
             )
+            return (await session.execute(stmt)).scalar_one()
+
+    async def find(
+            self,
+            conditions: List[ClauseElement] | None = None,
+            plan: LoadPlan = LoadPlans.NONE,
+            **filters
+    ) -> ModelType:
+        async with db.session() as session:
+            filter_keys = tuple(sorted(filters))
+            query = self.statements.get(
+                (self.model.__name__, "find", plan, filter_keys),
+                lambda: (
+                    self.filtered(filter_keys)
+                    .options(*plan.options)
+                    # the session may be shared by the unit of work, so refresh what it already holds
+                    .execution_options(populate_existing=True)
+                ),
+            )
+            if conditions:
+                query = query.where(*conditions) # type: ignore
 
-            result = await session.execute(query)
+            result = await session.execute(query, self.filter_params(filters))
             return result.scalars().first() # type: ignore
 
     async def find_all(
             self,
             pg: Pagination | None = None,
             conditions: List[ClauseElement] | None = None,
+            plan: LoadPlan = LoadPlans.NONE,
             **filters,
-    ) -> Tuple[List[ModelType], int]:
-        async with db.get_session() as session:
-            if pg is None:
-                pg = Pagination() # type: ignore
+    ) -> Tuple[List[ModelType], int | None]:
+        async with db.session() as session:
+            rows, total = await self.fetch_page(
+                session,
+                "find_all",
+                plan,
+                lambda filter_keys: (
+                    self.filtered(filter_keys)
+                    .options(*plan.options)
+                    .execution_options(populate_existing=True)
+                ),
+                pg,
+                conditions,
+                filters,
+            )
 
-            query = (
-                select(self.model)
-                .where(*(conditions or [])) # type: ignore
-                .limit(pg.limit)
-                .offset(pg.offset)
-                .order_by(pg.order_by)
-                .options(*self.model.get_loads())
-                .filter_by(**filters)
+            return [row[0] for row in rows], total
+
+    async def find_all_rows(
+            self,
+            plan: LoadPlan,
+            pg: Pagination | None = None,
+            conditions: List[ClauseElement] | None = None,
+            **filters,
+    ) -> Tuple[List[dict], int | None]:
+        """
+        Read-only variant of find_all: the plan's shape is read with Core
+        selects into plain dicts, without building ORM objects.
+        """
+        loader = RowLoader.for_plan(plan)
+
+        async with db.session() as session:
+            rows, total = await self.fetch_page(
+                session,
+                "find_all_rows",
+                plan,
+                lambda filter_keys: self.filtered(filter_keys, loader.columns),
+                pg,
+                conditions,
+                filters,
+            )
+
+            items = [dict(row._mapping) for row in rows]
+            for item in items:
+                item.pop("total", None)
+
+            return await loader.load(session, items), total
+
+    async def find_all_json(
+            self,
+            plan: LoadPlan,
+            pg: Pagination | None = None,
+            conditions: List[ClauseElement] | None = None,
+            **filters,
+    ) -> Tuple[Sequence[Row], int | None]:
+        """
+        Rows with the plan's DTO already rendered to JSON by Postgres in `json`,
+        next to the primary key and sort key columns for the cursor.
+        """
+        projection = JsonProjection.for_plan(plan)
+        columns = [projection.expression] + [
+            column.label(column.key)
+            for column in self.model.__table__.columns
+            if column.primary_key or column.key in plan.keep
+        ]
+
+        async with db.session() as session:
+            return await self.fetch_page(
+                session,
+                "find_all_json",
+                plan,
+                lambda filter_keys: self.filtered(filter_keys, columns),
+                pg,
+                conditions,
+                filters,
             )
 
-            count_query = select(func.count()).select_from(
-                select(self.model).where(*(conditions or [])).filter_by(**filters).subquery() # type: ignore
+    async def fetch_page(
+            self,
+            session: AsyncSession,
+            name: str,
+            plan: LoadPlan,
+            base: Callable[[Tuple[str, ...]], Select],
+            pg: Pagination | None,
+            conditions: List[ClauseElement] | None,
+            filters: dict,
+    ) -> Tuple[Sequence[Row], int | None]:
+        if pg is None:
+            pg = Pagination() # type: ignore
+
+        key_column, pk_column = self.get_sort_columns(pg.order_by)
+        filter_keys = tuple(sorted(filters))
+        # a window count is only the total when no seek predicate narrows the rows
+        window = pg.count == CountStrategy.EXACT and not pg.after
+
+        cursor_key = cursor_pk = None
+        if pg.after:
+            cursor_key, cursor_pk = pg.decode_cursor(key_column, pk_column)
+        after_null = bool(pg.after) and cursor_key is None
+
+        query = self.statements.get(
+            (self.model.__name__, name, plan, filter_keys, key_column.key, bool(pg.after), after_null, window),
+            lambda: self.build_page_query(
+                base(filter_keys), key_column, pk_column, bool(pg.after), window, after_null
+            ),
+        )
+        filtered = self.statements.get(
+            (self.model.__name__, "filtered", filter_keys),
+            lambda: self.filtered(filter_keys),
+        )
+        if conditions:
+            query = query.where(*conditions) # type: ignore
+            filtered = filtered.where(*conditions) # type: ignore
+
+        params = self.filter_params(filters)
+        page_params = params | {"limit": pg.limit}
+        if pg.after:
+            page_params["cursor_pk"] = cursor_pk
+            if not after_null:
+                page_params["cursor_key"] = cursor_key
+        else:
+            page_params["offset"] = pg.offset
+
+        rows = (await session.execute(query, page_params)).unique().all()
+        if not window:
+            return rows, await self.count(session, filtered, params, pg.count) # type: ignore
+
+        if rows:
+            total = rows[0].total
+        elif pg.offset:
+            total = await self.count(session, filtered, params, CountStrategy.EXACT) # type: ignore
+        else:
+            total = 0
+
+        return rows, total
+
+    def filtered(self, filter_keys: Tuple[str, ...], columns: Sequence[ColumnElement] | None = None) -> Select:
+        return select(*columns if columns else (self.model,)).where(
+            *(getattr(self.model, key) == bindparam(f"filter_{key}") for key in filter_keys)
+        )
+
+    @staticmethod
+    def filter_params(filters: dict) -> dict:
+        return {f"filter_{key}": value for key, value in filters.items()}
+
+    @staticmethod
+    def build_page_query(
+            base: Select,
+            key_column: Column,
+            pk_column: Column,
+            after: bool,
+            window: bool,
+            after_null: bool = False,
+    ) -> Select:
+        if key_column is pk_column:
+            sort_columns = [pk_column]
+        elif key_column.nullable:
+            # NULL keys get a defined position, after every other key
+            sort_columns = [key_column.asc().nulls_last(), pk_column]
+        else:
+            sort_columns = [key_column, pk_column]
+        query = base.limit(bindparam("limit", type_=Integer)).order_by(*sort_columns)
+
+        cursor_pk = bindparam("cursor_pk", type_=pk_column.type)
+        if not after:
+            query = query.offset(bindparam("offset", type_=Integer))
+        elif key_column is pk_column:
+            query = query.where(pk_column > cursor_pk)
+        elif after_null:
+            # past a NULL key only NULL keys are left
+            query = query.where(key_column.is_(None), pk_column > cursor_pk)
+        else:
+            seek = tuple_(key_column, pk_column) > tuple_(
+                bindparam("cursor_key", type_=key_column.type), cursor_pk,
             )
+            # a row comparison with NULL is never true
+            query = query.where(or_(seek, key_column.is_(None)) if key_column.nullable else seek)
+
+        if window:
+            query = query.add_columns(func.count().over().label("total"))
+
+        return query
+
+    async def count(
+            self, session: AsyncSession, filtered: Select, params: dict, strategy: CountStrategy
+    ) -> int | None:
+        if strategy == CountStrategy.NONE:
+            return None
+
+        if strategy == CountStrategy.ESTIMATED:
+            plan = (await session.execute(Explain(filtered), params)).scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            return int(plan[0]["Plan"]["Plan Rows"])
 
-            result = await session.execute(query)
-            total = await session.execute(count_query)
+        count_query = select(func.count()).select_from(filtered.subquery())
+        if strategy == CountStrategy.EXACT:
+            return (await session.execute(count_query, params)).scalar()
+
+        backend = cache_backend()
+        if backend is None:
+            return (await session.execute(count_query, params)).scalar()
+
+        compiled = filtered.compile()
+        digest = hashlib.sha1(
+            f"{compiled}{sorted((compiled.params | params).items())}".encode()
+        ).hexdigest()
+        try:
+            # under the table version taken before counting, a committed write makes it unreachable
+            version, = await table_versions.versions([self.model.__tablename__])
+            key = f"{FastAPICache.get_prefix()}:count:{self.model.__tablename__}:{version}:{digest}"
+            total = await backend.get(key)
+        except RedisError:
+            return (await session.execute(count_query, params)).scalar()
+
+        if total is None:
+            # the replica may not have the rows of the version yet
+            with db.primary_reads():
+                async with db.session() as primary:
+                    total = (await primary.execute(count_query, params)).scalar()
+            try:
+                await backend.set(key, str(total), expire=self.count_expire) # type: ignore
+            except RedisError:
+                pass
+
+        return int(total) # type: ignore
+
+    async def invalidate(self):
+        await table_versions.bump_on_commit(self.model.__tablename__)
+
+    @staticmethod
+    def to_copy_value(value):
+        return value.value if isinstance(value, Enum) else value
+
+    def get_sort_columns(self, order_by: str | None) -> Tuple[Column, Column]:
+        pk_column = inspect(self.model).primary_key[0]
+        if not order_by:
+            return pk_column, pk_column
+
+        key_column = self.model.__table__.columns.get(order_by)
+        if key_column is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cannot order by {order_by}",
+            )
 
-            return result.unique().scalars().all(), total.scalar() # type: ignore
+        return key_column, pk_column
@@ -0,0 +1,40 @@
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from prometheus_client import Counter
+from sqlalchemy import Executable
+
+STATEMENT_CACHE = Counter(
+    "repository_statement_cache_total", "Repository statement cache lookups", ["model", "result"]
+)
+
+
+class StatementCache:
+    """
+    LRU of built statements keyed by their shape (model, load plan, filter keys...).
+    Cached statements only take bind parameters, so they can be reused as is.
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._statements: OrderedDict[Hashable, Executable] = OrderedDict()
+
+    def get(self, key: Hashable, build: Callable[[], Executable]) -> Executable:
+        statement = self._statements.get(key)
+        if statement is not None:
+            self._statements.move_to_end(key)
+            self.hits += 1
+            STATEMENT_CACHE.labels(key[0], "hit").inc() # type: ignore
+            return statement
+
+        self.misses += 1
+        STATEMENT_CACHE.labels(key[0], "miss").inc() # type: ignore
+
+        statement = build()
+        self._statements[key] = statement
+        if len(self._statements) > self.maxsize:
+            self._statements.popitem(last=False)
+
+        return statement
@@ -0,0 +1,70 @@
+from typing import Iterable, List, Optional
+from uuid import uuid4
+
+from fastapi_cache import FastAPICache
+from fastapi_cache.types import Backend
+from redis import RedisError
+
+from app.config.database import db
+
+# tables whose rows triggers change along with the written one
+TRIGGERED = {
+    "book_copies": ("books",),
+    "requests": ("books",),
+}
+
+
+def cache_backend() -> Optional[Backend]:
+    """
+    The FastAPICache backend, None when it isn't set up: nothing is cached
+    outside of the app's lifespan (scripts, jobs run by hand).
+    """
+    try:
+        return FastAPICache.get_backend()
+    except AssertionError:
+        return None
+
+
+class TableVersions:
+    """
+    A version per table, replaced after every committed write to it. Reads
+    that take the versions before querying can tell from them alone
+    whether anything they depend on changed since.
+    """
+
+    def key(self, table: str) -> str:
+        return f"{FastAPICache.get_prefix()}:table:{table}"
+
+    async def versions(self, tables: Iterable[str]) -> List[str]:
+        backend = FastAPICache.get_backend()
+        # a missing version, e.g. after Redis lost its data, must not repeat one handed out before
+        return [await backend.setdefault(self.key(table), uuid4().hex) for table in tables] # type: ignore
+
+    async def bump(self, *tables: str):
+        backend = cache_backend()
+        if backend is None:
+            return
+
+        try:
+            for table in dict.fromkeys(tables):
+                await backend.replace(self.key(table), uuid4().hex) # type: ignore
+        except RedisError:
+            pass
+
+    async def bump_on_commit(self, *tables: str):
+        """Bump once the current unit of work commits, each table once per unit of work."""
+        unit_of_work = db.current_unit_of_work()
+        if unit_of_work is None:
+            await self.bump(*tables, *(name for table in tables for name in TRIGGERED.get(table, ())))
+            return
+
+        written = unit_of_work.written_tables
+        if not written:
+            # after the cache purges, so a read of the new versions never finds a purged entry
+            await db.after_commit(lambda: self.bump(*written), last=True)
+        written.update(tables)
+        for table in tables:
+            written.update(TRIGGERED.get(table, ()))
+
+
+table_versions = TableVersions()
@@ -0,0 +1,71 @@
+from typing import Optional
+
+from sqlalchemy import Row, text
+
+from app.config.database import db
+from app.models import BookCopyORM, HistoryORM, RequestORM
+from app.repositories.table_versions import table_versions
+
+# closes the copy's open history entry, pops the oldest queued request of the
+# book (waiters locked by a concurrent return are skipped) and reserves the
+# copy for it, or makes it available when nobody waits. Only a borrowed copy
+# is returned: a copy that is not (or no longer) borrowed matches nothing, so
+# no waiter is popped for it
+RETURN_COPY = text(
+    """
+    WITH copy AS (
+        SELECT serial_num, book_id FROM book_copies
+        WHERE serial_num = :serial_num AND status = 'BORROWED'
+        FOR UPDATE
+    ), closed AS (
+        UPDATE histories SET borrowed_to = current_date
+        WHERE id = (
+            SELECT max(h.id) FROM histories h
+            JOIN copy ON copy.serial_num = h.copy_id
+            WHERE h.borrowed_to IS NULL
+        )
+    ), waiter AS (
+        SELECT r.id, r.reader_id
+        FROM requests r
+        JOIN copy ON copy.book_id = r.book_id
+        WHERE r.status = 'QUEUED'
+        ORDER BY r.created_at, r.id
+        LIMIT 1
+        FOR UPDATE OF r SKIP LOCKED
+    ), popped AS (
+        UPDATE requests SET status = 'PENDING'
+        FROM waiter
+        WHERE requests.id = waiter.id
+        RETURNING requests.id, requests.reader_id
+    )
+    UPDATE book_copies c
+    SET status = CASE
+        WHEN EXISTS (SELECT 1 FROM popped) THEN 'RESERVED'
+        ELSE 'AVAILABLE'
+    END::bookcopystatus
+    FROM copy
+    WHERE c.serial_num = copy.serial_num AND c.status = 'BORROWED'
+    RETURNING c.serial_num, c.book_id, c.status, c.access_type,
+        (SELECT id FROM popped) AS request_id,
+        (SELECT reader_id FROM popped) AS reader_id,
+        (SELECT email FROM readers WHERE id = (SELECT reader_id FROM popped)) AS email,
+        (SELECT title FROM books WHERE id = c.book_id) AS book_title
+    """
+)
+
+
+class WaitlistRepository:
+    async def return_copy(self, serial_num: str) -> Optional[Row]:
+        """
+        Hand a returned copy to the next reader in the FIFO waitlist of its
+        book, in one statement. None if there is no such borrowed copy.
+        """
+        async with db.transaction() as session:
+            result = await session.execute(RETURN_COPY, {"serial_num": serial_num})
+            book_copy = result.first()
+
+        await table_versions.bump_on_commit(
+            *(model.__tablename__ for model in (BookCopyORM, HistoryORM, RequestORM))
+        )
+
+        return book_copy
@@ -2,13 +2,16 @@ from app.schemas.book import (
     BookDTO as BookDTO,
     BookCreateDTO as BookCreateDTO,
     BookCopyCreateDTO as BookCopyCreateDTO,
-    BookClearDTO as BookClearDTO
+    BookClearDTO as BookClearDTO,
+    BookImportDTO as BookImportDTO,
+    BookImportErrorDTO as BookImportErrorDTO,
+    ImportFormat as ImportFormat,
 )
 from app.schemas.book_copy import (
     BookCopyDTO as BookCopyDTO,
     BookCopyFullDTO as BookCopyFullDTO
 )
-from app.schemas.loan import LoanDTO as LoanDTO
+from app.schemas.loan import LoanDTO as LoanDTO, OverdueLoanDTO as OverdueLoanDTO
 from app.schemas.multi_dto import MultiDTO as MultiDTO
 from app.schemas.profile import (
     ProfileDTO as ProfileDTO,
@@ -1,10 +1,16 @@
-from typing import Annotated, Optional
+from enum import Enum
+from typing import Annotated, List, Optional
 
 from pydantic import BaseModel, Field, ConfigDict
 
 from app.models.types import BookAccessType
 
 
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+
+
 class BookCopyCreateDTO(BaseModel):
     serial_num: str
     access_type: BookAccessType
@@ -26,3 +32,21 @@ class BookCreateDTO(BookClearDTO):
 class BookDTO(BookClearDTO):
     id: int
     cover_url: Optional[str]
+    available_count: int = 0
+    reserved_count: int = 0
+    borrowed_count: int = 0
+    queue_length: int = 0
+
+
+class BookImportErrorDTO(BaseModel):
+    row: int
+    detail: str
+
+
+class BookImportDTO(BaseModel):
+    books: int
+    copies: int
+    rejected: int
+    errors: List[BookImportErrorDTO]
+    seconds: float
+    rows_per_second: float
@@ -15,4 +15,18 @@ class LoanDTO(BaseModel):
     copy_id: str
     issue_date: datetime
     due_date: datetime
-    return_date: datetime | None
\ No newline at end of file
+    return_date: datetime | None
+
+class OverdueLoanDTO(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    reader_id: int
+    reader_name: str
+    reader_email: str
+    copy_id: str
+    book_id: int
+    book_title: str
+    issue_date: datetime
+    due_date: datetime
+    days_overdue: int
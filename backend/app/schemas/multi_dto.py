@@ -1,4 +1,5 @@
-from typing import TypeVar, List
+import json
+from typing import TypeVar, List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -9,4 +10,14 @@ class MultiDTO[SchemaType](BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     items: List[SchemaType]
-    total: int
\ No newline at end of file
+    total: Optional[int]
+    next_cursor: Optional[str] = None
+
+    @staticmethod
+    def json_from_items(items: List[str], total: Optional[int], next_cursor: Optional[str] = None) -> str:
+        """Same document as model_dump_json() for items that are already JSON."""
+        return (
+            f'{{"items":[{",".join(items)}],'
+            f'"total":{json.dumps(total)},'
+            f'"next_cursor":{json.dumps(next_cursor)}}}'
+        )
\ No newline at end of file
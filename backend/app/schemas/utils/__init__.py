@@ -1,5 +1,6 @@
 from .filters import BookFilter as BookFilter
-from .pagination import Pagination as Pagination
+from .fields import Fields as Fields, partial_schema as partial_schema
+from .pagination import Pagination as Pagination, CountStrategy as CountStrategy
 from .token import (
     Token as Token,
     TokenData as TokenData,
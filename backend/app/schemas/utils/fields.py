@@ -0,0 +1,47 @@
+from functools import lru_cache
+from typing import Annotated, FrozenSet, Optional, Type
+
+from fastapi import HTTPException, Query
+from fastapi.responses import Response
+from pydantic import BaseModel, ConfigDict, create_model
+from starlette import status
+
+
+class Fields(BaseModel):
+    fields: Annotated[Optional[str], Query(None, description="Comma separated fields to return")]
+
+    def select(self, schema: Type[BaseModel]) -> Optional[FrozenSet[str]]:
+        if not self.fields:
+            return None
+
+        selected = frozenset(name.strip() for name in self.fields.split(",") if name.strip())
+        unknown = selected - set(schema.model_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+            )
+
+        return selected
+
+    @staticmethod
+    def response(dto: BaseModel) -> Response:
+        # items are built from trusted rows and may be partial, so the declared
+        # response model is only documentation and is not validated again
+        return Response(dto.model_dump_json(), media_type="application/json")
+
+
+@lru_cache(maxsize=256)
+def partial_schema(schema: Type[BaseModel], fields: Optional[FrozenSet[str]]) -> Type[BaseModel]:
+    if fields is None:
+        return schema
+
+    return create_model( # type: ignore
+        f"{schema.__name__}Partial",
+        __config__=ConfigDict(from_attributes=True),
+        **{
+            name: (field.annotation, field)
+            for name, field in schema.model_fields.items()
+            if name in fields
+        },
+    )
@@ -13,6 +13,7 @@ class BookFilter(BaseModel):
     author: Annotated[Optional[str], Query(None)]
     publisher: Annotated[Optional[str], Query(None)]
     year_publication: Annotated[Optional[int], Query(None)]
+    available: Annotated[Optional[bool], Query(None)]
 
     @property
     def conditions(self) -> List[ClauseElement]:
@@ -23,6 +24,11 @@ class BookFilter(BaseModel):
             conditions.append(BookORM.publisher.ilike(f"%{self.publisher}%"))
         if self.year_publication:
             conditions.append(BookORM.year_publication == self.year_publication)
+        if self.available is not None:
+            if self.available:
+                conditions.append(BookORM.available_count > 0)
+            else:
+                conditions.append(BookORM.available_count == 0)
 
         return conditions
 
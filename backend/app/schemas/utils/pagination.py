@@ -1,11 +1,69 @@
-from typing import Annotated, Optional, Dict
+import base64
+import binascii
+import json
+from datetime import date
+from enum import Enum
+from typing import Annotated, Any, Mapping, Optional, Sequence, Tuple
 
-from fastapi import Query
+from fastapi import HTTPException, Query
 from pydantic import BaseModel
+from sqlalchemy import Column, inspect
+from starlette import status
+
+MAX_LIMIT = 500
+
+
+class CountStrategy(str, Enum):
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+    NONE = "none"
 
 
 class Pagination(BaseModel):
-    limit: Annotated[int, Query(100)]
-    offset: Annotated[int, Query(0)]
+    limit: Annotated[int, Query(100, ge=1, le=MAX_LIMIT)]
+    offset: Annotated[int, Query(0, ge=0)]
     order_by: Annotated[Optional[str], Query("id")]
+    after: Annotated[Optional[str], Query(None, description="next_cursor of the previous page")]
+    count: Annotated[CountStrategy, Query(CountStrategy.EXACT, description="How the total is computed")]
+
+    def next_cursor(self, items: Sequence[Any], pk_key: str = "id") -> Optional[str]:
+        if len(items) < self.limit:
+            return None
+
+        last = items[-1]
+        if isinstance(last, Mapping):
+            pk = last[pk_key]
+            key = last.get(self.order_by, pk) if self.order_by else pk
+        else:
+            pk = inspect(last).identity[0]
+            key = getattr(last, self.order_by, pk) if self.order_by else pk
+
+        payload = json.dumps({"o": self.order_by, "k": key, "id": pk}, default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, key_column: Column, pk_column: Column) -> Tuple[Any, Any]:
+        error = HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Bad cursor",
+        )
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(self.after or ""))
+            if payload["o"] != self.order_by:
+                raise error
+
+            return self.cast_cursor_value(key_column, payload["k"]), self.cast_cursor_value(pk_column, payload["id"])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise error
+
+    @staticmethod
+    def cast_cursor_value(column: Column, value: Any) -> Any:
+        if value is None:
+            return None
+
+        python_type = column.type.python_type
+        if issubclass(python_type, date):
+            return python_type.fromisoformat(value)
 
+        return python_type(value)
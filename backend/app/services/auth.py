@@ -3,6 +3,7 @@ from passlib.context import CryptContext
 from starlette import status
 
 from app.schemas.utils import Token
+from app.repositories.load_plan import LoadPlans
 from app.repositories.sqlalchemy import SqlAlchemyRepository
 from app.utils.auth.oauth2 import OAuth2Utility
 
@@ -19,7 +20,9 @@ class AuthService:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-        reader = await self.reader_repository.find(email=form_data.username)
+        reader = await self.reader_repository.find(
+            plan=LoadPlans.READER_SEMI_RELATION, email=form_data.username
+        )
         if reader is None or reader.profile is None:
             raise error
 
@@ -1,14 +1,17 @@
-import asyncio
-from datetime import datetime
+import codecs
+import csv
+import json
+import time
 import os.path
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
 
 import aiohttp
 from fastapi import HTTPException, UploadFile
+from pydantic import ValidationError
 from starlette import status
 
 from app.models import BookCopyORM, BookORM, RequestORM, HistoryORM
-from app.models.types import BookCopyStatus, RequestStatus
+from app.models.types import BookAccessType, BookCopyStatus, RequestStatus
 from app.modules.s3 import upload_file_to_s3
 from app.schemas import (
     BookDTO,
@@ -17,13 +20,20 @@ from app.schemas import (
     BookCopyCreateDTO,
     BookCopyFullDTO,
     BookCopyDTO,
-    BookClearDTO
+    BookClearDTO,
+    BookImportDTO,
+    BookImportErrorDTO,
+    ImportFormat,
 )
 from app.schemas.relations import BookRelationDTO
-from app.schemas.utils import Pagination
+from app.schemas.utils import Fields, Pagination
 from app.schemas.utils.filters import BookFilter
+from app.repositories.catalog_import import BookRecord, CatalogImportRepository, CopyRecord
+from app.repositories.load_plan import LoadPlan, LoadPlans
 from app.repositories.sqlalchemy import SqlAlchemyRepository
-from app.modules.email.email_sender import send_notification_email
+from app.repositories.waitlist import WaitlistRepository
+from app.modules.email import send_after_commit, send_notification_email
+from app.utils.response_cache import CATALOG_TAG, book_tag, reader_tag, response_cache
 
 
 class BookService:
@@ -32,16 +42,26 @@ class BookService:
             book_repository: SqlAlchemyRepository[BookORM],
             book_copy_repository: SqlAlchemyRepository[BookCopyORM],
             request_repository: SqlAlchemyRepository[RequestORM],
-            history_repository: SqlAlchemyRepository[HistoryORM]
+            history_repository: SqlAlchemyRepository[HistoryORM],
+            catalog_import_repository: CatalogImportRepository,
+            waitlist_repository: WaitlistRepository,
     ):
         self.book_repository: SqlAlchemyRepository[BookORM] = book_repository
         self.book_copy_repository: SqlAlchemyRepository[BookCopyORM] = book_copy_repository
         self.request_repository: SqlAlchemyRepository[RequestORM] = request_repository
         self.history_repository: SqlAlchemyRepository[HistoryORM] = history_repository
-
-
-    async def get_single(self, get_orm: bool = False, **filters) -> BookRelationDTO | BookORM:
-        book = await self.book_repository.find(**filters)
+        self.catalog_import_repository: CatalogImportRepository = catalog_import_repository
+        self.waitlist_repository: WaitlistRepository = waitlist_repository
+
+    @staticmethod
+    async def purge(*book_ids: int):
+        """Drop the cached catalog pages and the pages of the given books once committed."""
+        await response_cache.invalidate_on_commit(CATALOG_TAG, *(book_tag(book_id) for book_id in book_ids))
+
+    async def get_single(
+            self, get_orm: bool = False, plan: LoadPlan = LoadPlans.BOOK_RELATION, **filters
+    ) -> BookRelationDTO | BookORM:
+        book = await self.book_repository.find(plan=plan, **filters)
         if book is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
@@ -51,37 +71,178 @@ class BookService:
 
         return BookRelationDTO.model_validate(book)
 
-    async def get_multi(
-            self, pg: Pagination, book_filters: Optional[BookFilter] = None, **filters
-    ) -> MultiDTO[BookRelationDTO]:
-        books, total = await self.book_repository.find_all(
+    async def get_multi_json(
+            self,
+            pg: Pagination,
+            book_filters: Optional[BookFilter] = None,
+            fields: Optional[Fields] = None,
+            **filters
+    ) -> str:
+        rows, total = await self.book_repository.find_all_json(
+            LoadPlans.BOOK_RELATION.projection(fields.select(BookRelationDTO) if fields else None, pg.order_by),
             pg=pg,
-            conditions=book_filters.conditions, # type: ignore
+            conditions=book_filters.conditions if book_filters else None,
             **filters
         )
 
-        books_dto = MultiDTO(items=[BookRelationDTO.model_validate(row) for row in books], total=total)
-        return books_dto
+        return MultiDTO.json_from_items(
+            [row.json for row in rows],
+            total=total,
+            next_cursor=pg.next_cursor([row._mapping for row in rows]),
+        )
 
     async def add_book(self, book: BookCreateDTO) -> BookDTO:
         book_dict = book.model_dump()
 
         copy_list = book_dict.pop("copies")
         db_book = await self.book_repository.create(book_dict)
-        await self.book_copy_repository.create_multiple(
+        await self.book_copy_repository.copy_multiple(
             [row | {"book_id": db_book.id} for row in copy_list]
         )
+        await self.purge(db_book.id)
 
         book_dto: BookRelationDTO = await self.get_single(id=db_book.id) # type: ignore
         return book_dto
 
     async def add_multi(self, books: List[BookCreateDTO]) -> List[BookDTO]:
-        books_dict = [row.model_dump() for row in books]
+        books_dict = [row.model_dump(exclude={"copies"}) for row in books]
         db_books = await self.book_repository.create_multiple(books_dict)
 
+        await self.book_copy_repository.copy_multiple([
+            copy.model_dump() | {"book_id": db_book.id}
+            for book, db_book in zip(books, db_books)
+            for copy in book.copies
+        ])
+        await self.purge()
+
         list_books_dto = [BookDTO.model_validate(row) for row in db_books]
         return list_books_dto
 
+    async def import_books(
+            self,
+            stream: AsyncIterator[bytes],
+            fmt: ImportFormat,
+            batch_size: int = 1000,
+            max_errors: int = 1000,
+    ) -> BookImportDTO:
+        errors: List[BookImportErrorDTO] = []
+        stats = {"rows": 0, "invalid": 0}
+        started = time.perf_counter()
+
+        def validate(pending: List[Tuple[int, str]], header: List[str]):
+            books: List[BookRecord] = []
+            copies: List[CopyRecord] = []
+
+            for line_num, line in pending:
+                stats["rows"] += 1
+                try:
+                    book = BookCreateDTO.model_validate(self.parse_import_line(line, fmt, header))
+                except (ValidationError, ValueError, csv.Error) as e:
+                    stats["invalid"] += 1
+                    if len(errors) < max_errors:
+                        errors.append(BookImportErrorDTO(row=line_num, detail=self.format_import_error(e)))
+                    continue
+
+                books.append((line_num, book.title, book.author, book.publisher, book.year_publication))
+                copies.extend((line_num, copy.serial_num, copy.access_type.value) for copy in book.copies)
+
+            return books, copies
+
+        async def batches():
+            header: List[str] = []
+            pending: List[Tuple[int, str]] = []
+
+            async for line_num, line in self.iter_lines(stream):
+                if fmt == ImportFormat.CSV and not header:
+                    header = [name.strip() for name in next(csv.reader([line]))]
+                    continue
+                if not line.strip():
+                    continue
+
+                pending.append((line_num, line))
+                if len(pending) >= batch_size:
+                    yield validate(pending, header)
+                    pending = []
+
+            if pending:
+                yield validate(pending, header)
+
+        try:
+            books_count, copies_count, rejected, conflicts = (
+                await self.catalog_import_repository.import_books(batches(), max_conflicts=max_errors)
+            )
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File must be UTF-8 encoded",
+            )
+
+        if books_count:
+            await self.purge()
+
+        errors.extend(
+            BookImportErrorDTO(row=row, detail=f"Serial number {serial_num} already exists")
+            for row, serial_num in conflicts[:max(max_errors - len(errors), 0)]
+        )
+
+        seconds = time.perf_counter() - started
+        return BookImportDTO(
+            books=books_count,
+            copies=copies_count,
+            rejected=stats["invalid"] + rejected,
+            errors=sorted(errors, key=lambda error: error.row),
+            seconds=round(seconds, 3),
+            rows_per_second=round(stats["rows"] / seconds, 1) if seconds else 0.0,
+        )
+
+    @staticmethod
+    async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        buffer = ""
+        line_num = 0
+
+        async for chunk in stream:
+            buffer += decoder.decode(chunk)
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                line_num += 1
+                yield line_num, line.rstrip("\r")
+
+        buffer += decoder.decode(b"", final=True)
+        if buffer:
+            yield line_num + 1, buffer.rstrip("\r")
+
+    @staticmethod
+    def parse_import_line(line: str, fmt: ImportFormat, header: List[str]) -> dict:
+        if fmt == ImportFormat.JSONL:
+            return json.loads(line)
+
+        values = next(csv.reader([line]))
+        if len(values) != len(header):
+            raise ValueError(f"Expected {len(header)} columns, got {len(values)}")
+
+        row: dict = dict(zip(header, values))
+        copies = []
+        # copies column: "serial_num[:ACCESS_TYPE]|serial_num[:ACCESS_TYPE]..."
+        for item in filter(None, row.pop("copies", "").split("|")):
+            serial_num, _, access_type = item.partition(":")
+            copies.append({
+                "serial_num": serial_num.strip(),
+                "access_type": access_type.strip() or BookAccessType.TAKE_HOME,
+            })
+        row["copies"] = copies
+
+        return row
+
+    @staticmethod
+    def format_import_error(error: Exception) -> str:
+        if isinstance(error, ValidationError):
+            return "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in error.errors()
+            )
+
+        return str(error)
+
     async def update_book(self, book_id: int, book: BookClearDTO) -> BookDTO:
         db_book = await self.book_repository.find(id=book_id)
         if db_book is None:
@@ -91,7 +252,8 @@ class BookService:
 
         book_dict = book.model_dump()
         await self.book_repository.update(data=book_dict, id=book_id)
-        updated_book = await self.book_repository.find(id=book_id)
+        await self.purge(book_id)
+        updated_book = await self.book_repository.find(plan=LoadPlans.BOOK_RELATION, id=book_id)
 
         return BookRelationDTO.model_validate(updated_book)
 
@@ -103,6 +265,7 @@ class BookService:
                 status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
             )
 
+        await self.purge(book_id)
         return BookDTO.model_validate(book)
 
     async def set_cover_to_book(self, book_id: int, file: UploadFile) -> BookDTO:
@@ -118,28 +281,15 @@ class BookService:
             f.write(bytes(0))
 
         book = await self.book_repository.update(data={"cover_url": url}, id=book_id)
+        await self.purge(book_id)
 
         book_db = BookDTO.model_validate(book)
         return book_db
 
-    async def get_filtered_books(self, pg: Pagination, filters: BookFilter) -> MultiDTO[BookRelationDTO]:
-        books, total = await self.book_repository.find_all(
-            limit=pg.limit,
-            offset=pg.offset,
-            order_by=pg.order_by,
-            condition=[
-                filters.condition, # type: ignore
-            ],
-        )
-
-        return MultiDTO(
-            items=[BookRelationDTO.model_validate(row) for row in books],
-            total=total,
-        )
-
     async def add_copies(self, book_id: int, copies: List[BookCopyCreateDTO]) -> List[BookCopyFullDTO]:
         copies_dict = [row.model_dump() | { "book_id": book_id } for row in copies]
         copies_db = await self.book_copy_repository.create_multiple(copies_dict)
+        await self.purge(book_id)
 
         list_books_dto = [BookCopyFullDTO.model_validate(row) for row in copies_db]
         return list_books_dto
@@ -148,10 +298,80 @@ class BookService:
         db_copies = await self.book_copy_repository.delete(
             conditions=[BookCopyORM.serial_num.in_(copies)]
         )
+        if db_copies is not None:
+            await self.purge(db_copies.book_id)
 
         return BookCopyDTO.model_validate(db_copies)
 
+    async def reserve_copy(self, book_id: int) -> Optional[BookCopyORM]:
+        # SKIP LOCKED hands concurrent callers distinct copies, but the counter
+        # triggers then update the book's row: claims of one title still wait
+        # for each other's commit, only claims of different titles run in parallel
+        book_copy = await self.book_copy_repository.claim(
+            data={ "status": BookCopyStatus.RESERVED },
+            order_by=[BookCopyORM.serial_num],
+            status=BookCopyStatus.AVAILABLE,
+            book_id=book_id,
+        )
+
+        if book_copy is not None:
+            await self.purge(book_id)
+        return book_copy
+
+    async def release_copy(self, book_id: int) -> Optional[BookCopyORM]:
+        book_copy = await self.book_copy_repository.claim(
+            data={ "status": BookCopyStatus.AVAILABLE },
+            order_by=[BookCopyORM.serial_num],
+            status=BookCopyStatus.RESERVED,
+            book_id=book_id,
+        )
+
+        if book_copy is not None:
+            await self.purge(book_id)
+        return book_copy
+
+    async def borrow_copy(self, book_id: int, reader_name: str) -> Optional[BookCopyORM]:
+        book_copy = await self.book_copy_repository.claim(
+            data={ "status": BookCopyStatus.BORROWED },
+            order_by=[BookCopyORM.serial_num],
+            status=BookCopyStatus.RESERVED,
+            book_id=book_id,
+        )
+
+        if book_copy is not None:
+            await self.history_repository.create({
+                "copy_id": book_copy.serial_num,
+                "name": reader_name,
+            })
+            await self.purge(book_id)
+
+        return book_copy
+
+    async def return_copy(self, serial_num: str) -> Optional[BookCopyDTO]:
+        book_copy = await self.waitlist_repository.return_copy(serial_num)
+        if book_copy is None:
+            return None
+
+        await self.purge(book_copy.book_id)
+        if book_copy.reader_id is not None:
+            # the popped waiter's request is pending now
+            await response_cache.invalidate_on_commit(reader_tag(book_copy.reader_id))
+        if book_copy.email is not None:
+            await send_after_commit(
+                send_notification_email,
+                to=book_copy.email,
+                book_title=book_copy.book_title,
+            )
+
+        return BookCopyDTO.model_validate(book_copy)
+
     async def change_copy_status(self, new_status: BookCopyStatus, serial_num: str) -> BookCopyDTO:
+        if new_status == BookCopyStatus.AVAILABLE:
+            # a borrowed copy goes to the waitlist first, any other is just made available
+            book_copy = await self.return_copy(serial_num)
+            if book_copy is not None:
+                return book_copy
+
         book_copy = await self.book_copy_repository.update(
             data={ "status": new_status },
             serial_num=serial_num,
@@ -163,51 +383,17 @@ class BookService:
                 detail="Book copy not found",
             )
 
+        await self.purge(book_copy.book_id)
         if new_status == BookCopyStatus.BORROWED:
             request = (await self.request_repository.find_all(
+                plan=LoadPlans.REQUEST_RELATION,
                 status=RequestStatus.FULFILLED,
                 book_id=book_copy.book_id,
             ))[0][-1]
 
             await self.history_repository.create({
                     "copy_id": serial_num,
-                    "name": request.reader.profile.full_name.split(" ")[1],
+                    "name": request.reader.profile.first_name,
                 })
 
-        if new_status == BookCopyStatus.AVAILABLE:
-            history = (await self.history_repository.find_all(copy_id=serial_num))[0]
-            if len(history) != 0:
-                await self.history_repository.update(
-                    { "borrowed_to": datetime.now() },
-                    id=history[-1].id
-                )
-
-            request = (await self.request_repository.find_all(
-                pg=Pagination(
-                    limit=1,
-                    offset=0,
-                    order_by="created_at"
-                ),
-                status=RequestStatus.QUEUED,
-                book_id=book_copy.book_id
-            ))[0]
-
-            if len(request) != 0:
-                await self.request_repository.update(
-                    data={ "status": RequestStatus.PENDING },
-                    id=request[0].id
-                )
-
-                db_copy = await self.change_copy_status(
-                    new_status=BookCopyStatus.RESERVED,
-                    serial_num=serial_num
-                )
-
-                _ = await asyncio.create_task(send_notification_email(
-                    to=request[0].reader.email,
-                    book_title=request[0].book.title,
-                ))
-
-                return BookCopyDTO.model_validate(db_copy)
-
         return BookCopyDTO.model_validate(book_copy)
\ No newline at end of file
@@ -1,31 +1,39 @@
 import os
-from datetime import datetime
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Optional
 
 from docx import Document
 from fastapi import HTTPException
 from fastapi.responses import FileResponse
 from starlette import status
 
+from app.config.database import db
 from app.services.book import BookService
 from app.services.reader import ReaderService
+from app.repositories.load_plan import LoadPlans
+from app.repositories.overdue_loans import OverdueLoanRepository
+from app.repositories.row_loader import RowLoader
 from app.repositories.sqlalchemy import SqlAlchemyRepository
 from app.models import LoanORM
-from app.models.types import BookAccessType, BookCopyStatus
+from app.models.types import BookAccessType
 from app.schemas import MultiDTO
-from app.schemas.loan import LoanCreateDTO, LoanDTO
+from app.schemas.loan import LoanCreateDTO, LoanDTO, OverdueLoanDTO
 from app.schemas.relations import LoanRelationDTO
-from app.schemas.utils import Pagination
+from app.schemas.utils import Fields, Pagination, partial_schema
+
+LOAN_DAYS = 14
 
 
 class LoanService:
     def __init__(
             self,
             loan_repository: SqlAlchemyRepository[LoanORM],
+            overdue_loan_repository: OverdueLoanRepository,
             book_service: BookService,
             reader_service: ReaderService,
     ):
         self.loan_repository: SqlAlchemyRepository[LoanORM] = loan_repository
+        self.overdue_loan_repository: OverdueLoanRepository = overdue_loan_repository
         self.book_service: BookService = book_service
         self.reader_service: ReaderService = reader_service
 
@@ -33,82 +41,103 @@ class LoanService:
         self,
         pg: Pagination,
         conditions = None,
+        fields: Optional[Fields] = None,
         **filters
     ) -> MultiDTO[LoanRelationDTO]:
-        loans, total = await self.loan_repository.find_all(
+        selected = fields.select(LoanRelationDTO) if fields else None
+        loans, total = await self.loan_repository.find_all_rows(
+            LoadPlans.LOAN_RELATION.projection(selected, pg.order_by),
             pg=pg,
             conditions=conditions,
             **filters
         )
 
+        schema = partial_schema(LoanRelationDTO, selected)
         loans_db = MultiDTO(
-            items=[LoanRelationDTO.model_validate(loan) for loan in loans],
+            items=[RowLoader.construct(schema, loan) for loan in loans],
             total=total,
+            next_cursor=pg.next_cursor(loans),
         )
         return loans_db
 
     async def create_loan(self, loan: LoanCreateDTO) -> LoanDTO:
-        book = await self.book_service.get_single(id=loan.book_id)
-        global copy
-        for copy in book.copies:
-            if copy.status == BookCopyStatus.RESERVED:
-                await self.book_service.change_copy_status(
-                    new_status=BookCopyStatus.BORROWED,
-                    serial_num=copy.serial_num
-                )
-                break
-        else:
+        reader = await self.reader_service.get_orm_data(
+            plan=LoadPlans.READER_SEMI_RELATION, id=loan.reader_id
+        )
+
+        # the claimed copy stays locked until the unit of work commits the loan
+        copy = await self.book_service.borrow_copy(
+            book_id=loan.book_id,
+            reader_name=reader.profile.first_name,
+        )
+        if copy is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Avaliable copy not found"
             )
 
-        global db_loan
-
+        issue_date = datetime.now()
         if copy.access_type == BookAccessType.READING_ROOM:
-            db_loan = await self.loan_repository.create({ 
-                "reader_id": loan.reader_id,
-                "copy_id": copy.serial_num,
-                "due_date": datetime.now()
-            })
+            due_date = issue_date
         else:
-            db_loan = await self.loan_repository.create({ 
-                "reader_id": loan.reader_id,
-                "copy_id": copy.serial_num
-            })
+            due_date = issue_date + timedelta(days=LOAN_DAYS)
+
+        db_loan = await self.loan_repository.create({
+            "reader_id": loan.reader_id,
+            "copy_id": copy.serial_num,
+            "issue_date": issue_date,
+            "due_date": due_date,
+        })
+        await self.reader_service.purge(loan.reader_id)
 
         return LoanDTO.model_validate(db_loan)
 
     async def set_loan_as_returned(self, loan_id: int) -> LoanDTO:
-        await self.loan_repository.update(data={ "return_date": datetime.now() }, id=loan_id)
+        returned = await self.loan_repository.update(
+            data={ "return_date": datetime.now() },
+            conditions=[LoanORM.return_date.is_(None)],
+            id=loan_id,
+        )
         loan = await self.loan_repository.find(id=loan_id)
 
+        if loan is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Loan not found"
+            )
+        if returned is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Loan is already returned"
+            )
 
-        await self.book_service.change_copy_status(
-            new_status=BookCopyStatus.AVAILABLE,
-            serial_num=loan.book_copy.serial_num
-        )
+        await self.book_service.return_copy(loan.copy_id)
+        await self.reader_service.purge(loan.reader_id)
+        await db.after_commit(self.overdue_loan_repository.request_refresh)
 
         return LoanDTO.model_validate(loan)
 
-    async def get_overdue_loans(self, pg: Pagination) -> MultiDTO[LoanRelationDTO]:
-        loans, total = await self.loan_repository.find_all(
+    async def get_overdue_loans(
+        self, pg: Pagination, fields: Optional[Fields] = None
+    ) -> MultiDTO[OverdueLoanDTO]:
+        selected = fields.select(OverdueLoanDTO) if fields else None
+        loans, total = await self.overdue_loan_repository.find_open(
+            LoadPlans.OVERDUE_LOAN.projection(selected, pg.order_by),
             pg=pg,
-            conditions=[
-                LoanORM.due_date < datetime.now(),
-            ]
         )
 
+        schema = partial_schema(OverdueLoanDTO, selected)
         return MultiDTO(
             items=[
-                LoanRelationDTO.model_validate(loan)
+                RowLoader.construct(schema, loan)
                 for loan in loans
             ],
             total=total,
+            next_cursor=pg.next_cursor(loans),
         )
 
     @staticmethod
-    def create_report(loans: List[LoanRelationDTO], save_path: str) -> None:
+    def create_report(loans: List[OverdueLoanDTO], save_path: str) -> None:
         doc = Document()
         doc.add_heading("Отчёт по задолженности читателей", level=1)
         doc.add_paragraph(f"Дата создания: {datetime.today().strftime('%d.%m.%Y')}")
@@ -125,12 +154,12 @@ class LoanService:
 
         for loan in loans:
             row_cells = table.add_row().cells
-            row_cells[0].text = loan.reader.profile.full_name
-            row_cells[1].text = loan.book_copy.book.title
+            row_cells[0].text = loan.reader_name
+            row_cells[1].text = loan.book_title
             row_cells[2].text = loan.copy_id
             row_cells[3].text = loan.issue_date.strftime("%d.%m.%Y")
             row_cells[4].text = loan.due_date.strftime("%d.%m.%Y")
-            row_cells[5].text = str((datetime.now() - loan.due_date).days)
+            row_cells[5].text = str(loan.days_overdue)
 
         doc.save(save_path)
 
@@ -10,8 +10,10 @@ from app.modules.email import send_verify_email
 from app.modules.s3 import upload_file_to_s3
 from app.schemas import ReaderDTO, ReaderCreateDTO, ReaderUpdateDTO
 from app.schemas.relations import ReaderRelationDTO, ReaderSemiRelationDTO
+from app.repositories.load_plan import LoadPlan, LoadPlans
 from app.repositories.sqlalchemy import SqlAlchemyRepository
 from app.utils import OAuth2Utility
+from app.utils.response_cache import reader_tag, response_cache
 from app.models.profile import ProfileORM
 from app.models.reader import ReaderORM
 
@@ -26,6 +28,11 @@ class ReaderService:
         self.profile_repository: SqlAlchemyRepository[ProfileORM] = profile_repository
         self.redis: RedisRepository = RedisRepository()
 
+    @staticmethod
+    async def purge(reader_id: int):
+        """Drop the cached principal and profile of the reader once committed."""
+        await response_cache.invalidate_on_commit(reader_tag(reader_id))
+
     async def add_reader(self, reader: ReaderCreateDTO) -> ReaderSemiRelationDTO:
         reader_dict = reader.model_dump()
 
@@ -79,19 +86,24 @@ class ReaderService:
         os.remove(path_to_file)
 
         await self.profile_repository.update(data={"avatar_url": url}, reader_id=reader_id)
-        reader = await self.reader_repository.find(id=reader_id)
+        await self.purge(reader_id)
+        reader = await self.reader_repository.find(plan=LoadPlans.READER_RELATION, id=reader_id)
 
         book_db = ReaderRelationDTO.model_validate(reader)
         return book_db
 
-    async def get_orm_data(self, **kwargs):
-        reader = await self.reader_repository.find(**kwargs)
+    async def get_orm_data(self, plan: LoadPlan = LoadPlans.NONE, **kwargs):
+        reader = await self.reader_repository.find(plan=plan, **kwargs)
 
         if reader is None:
             raise HTTPException(status_code=404)
 
         return reader
 
+    async def lock_reader(self, reader_id: int):
+        if not await self.reader_repository.lock(id=reader_id):
+            raise HTTPException(status_code=404)
+
     async def set_verify_email_to_reader(self, token: str) -> ReaderDTO:
         redis_email = await self.redis.get_verify_tokens(token)
         if not redis_email:
@@ -100,4 +112,6 @@ class ReaderService:
         await self.redis.delete_verify_tokens(token)
 
         verified_reader = await self.reader_repository.update(data={"verified": True}, email=redis_email)
+        if verified_reader is not None:
+            await self.purge(verified_reader.id)
         return ReaderDTO.model_validate(verified_reader)
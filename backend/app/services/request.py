@@ -1,14 +1,16 @@
-import asyncio
+from typing import Optional
 
 from fastapi import HTTPException
 from starlette import status
 
-from app.models.types import RequestStatus, BookCopyStatus
-from app.modules.email import send_notification_email
+from app.models.types import RequestStatus
+from app.modules.email import send_after_commit, send_notification_email
+from app.repositories.load_plan import LoadPlans
+from app.repositories.row_loader import RowLoader
 from app.repositories.sqlalchemy import SqlAlchemyRepository
 from app.schemas import RequestDTO, MultiDTO
-from app.schemas.relations import RequestRelationDTO, ReaderRelationDTO, RequestSemiRelationDTO
-from app.schemas.utils import Pagination
+from app.schemas.relations import RequestRelationDTO, RequestSemiRelationDTO
+from app.schemas.utils import Fields, Pagination, partial_schema
 from app.services.reader import ReaderService
 from app.services.book import BookService
 from app.schemas.loan import LoanCreateDTO
@@ -34,31 +36,30 @@ class RequestService:
             "reader_id": reader_id,
             "book_id": book_id
         }
-        reader = await self.reader_service.get_orm_data(id=reader_id)
+        # the reader row lock serializes concurrent requests of one reader until commit
+        await self.reader_service.lock_reader(reader_id)
+        book = await self.book_service.get_single(get_orm=True, plan=LoadPlans.BOOK, id=book_id)
 
-        reader = ReaderRelationDTO.model_validate(reader)
-
-        request_list = [el for el in reader.requests if el.status != RequestStatus.FULFILLED]
-        if len(request_list) >= 5:
+        open_requests = await self.request_repository.count_by(
+            conditions=[RequestORM.status != RequestStatus.FULFILLED],
+            reader_id=reader_id,
+        )
+        if open_requests >= 5:
             raise HTTPException(
                 status_code=status.HTTP_406_NOT_ACCEPTABLE,
                 detail="You cannot request more than 5 requests",
             )
 
-        book = await self.book_service.get_single(get_orm=True, id=book_id)
         new_status = {}
-        for el in book.copies:
-            if el.status == BookCopyStatus.AVAILABLE:
-                await self.book_service.change_copy_status(
-                    new_status=BookCopyStatus.RESERVED,
-                    serial_num=el.serial_num
-                )
-                break
-        else:
+        if await self.book_service.reserve_copy(book_id) is None:
             new_status = { "status": RequestStatus.QUEUED }
 
         db_request = await self.request_repository.create(data | new_status)
         db_request.book = book
+        await self.reader_service.purge(reader_id)
+        if new_status:
+            # a queued request only changes the queue length of the book
+            await self.book_service.purge(book_id)
 
         return RequestSemiRelationDTO.model_validate(db_request)
 
@@ -75,6 +76,8 @@ class RequestService:
                 detail="Request not found"
             )
 
+        await self.book_service.purge(request.book_id)
+        await self.reader_service.purge(request.reader_id)
         if new_status == RequestStatus.PENDING:
             await self.send_notify(request_id)
 
@@ -83,22 +86,27 @@ class RequestService:
     async def get_multi(
         self, pg: Pagination,
         conditions = None,
+        fields: Optional[Fields] = None,
         **filters
     ) -> MultiDTO[RequestRelationDTO]:
-        requests, total = await self.request_repository.find_all(
+        selected = fields.select(RequestRelationDTO) if fields else None
+        requests, total = await self.request_repository.find_all_rows(
+            LoadPlans.REQUEST_RELATION.projection(selected, pg.order_by),
             pg=pg,
             conditions=conditions,
             **filters
         )
 
+        schema = partial_schema(RequestRelationDTO, selected)
         requests_db = MultiDTO(
-            items=[RequestRelationDTO.model_validate(row) for row in requests],
-            total=total
+            items=[RowLoader.construct(schema, row) for row in requests],
+            total=total,
+            next_cursor=pg.next_cursor(requests),
         )
         return requests_db
 
     async def get_single(self, request_id: int) -> RequestRelationDTO:
-        request = await self.request_repository.find(id=request_id)
+        request = await self.request_repository.find(plan=LoadPlans.REQUEST_RELATION, id=request_id)
 
         if request is None:
             raise HTTPException(
@@ -121,19 +129,18 @@ class RequestService:
                 detail=f"Request not found"
             )
         
-        book = await self.book_service.get_single(get_orm=True, id=request.book_id)
-        for el in book.copies:
-            if el.status == BookCopyStatus.RESERVED:
-                await self.book_service.change_copy_status(
-                    new_status=BookCopyStatus.AVAILABLE,
-                    serial_num=el.serial_num
-                )
-                break
+        await self.reader_service.purge(reader_id)
+        # only a pending request holds a reserved copy, a queued one is still waiting
+        if request.status == RequestStatus.PENDING:
+            await self.book_service.release_copy(request.book_id)
+        elif request.status == RequestStatus.QUEUED:
+            await self.book_service.purge(request.book_id)
 
         return RequestDTO.model_validate(request)
 
     async def send_notify(self, id: int) -> bool:
         request = await self.request_repository.find(
+            plan=LoadPlans.REQUEST_RELATION,
             id=id,
             status=RequestStatus.PENDING
         )
@@ -144,12 +151,13 @@ class RequestService:
                 detail=f"Request not found"
             )
 
-        result = await asyncio.create_task(send_notification_email(
+        await send_after_commit(
+            send_notification_email,
             to=request.reader.email,
             book_title=request.book.title,
-        ))
+        )
 
-        return result
+        return True
 
     async def give_book(self, request_id: int) -> RequestDTO:
         request = await self.update_status(
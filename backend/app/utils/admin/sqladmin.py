@@ -6,7 +6,7 @@ from starlette.requests import Request
 from app.config import auth_config
 from app.config.database import db
 from app.models.types import Role
-from app.repositories import RepositoryFactory as RF
+from app.repositories import RepositoryFactory as RF, LoadPlans
 from app.utils import OAuth2Utility
 from app.utils.admin.views import (
     BookAdmin,
@@ -28,7 +28,7 @@ class AdminAuth(AuthenticationBackend):
         email: str = form.get("username") # type: ignore
         password: str = form.get("password") # type: ignore
 
-        db_reader = await self.reader_repository.find(email=email)
+        db_reader = await self.reader_repository.find(plan=LoadPlans.READER_SEMI_RELATION, email=email)
         if not db_reader:
             return False
         if db_reader.role != Role.ADMIN:
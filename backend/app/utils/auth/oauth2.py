@@ -1,16 +1,20 @@
 from datetime import timedelta, datetime, timezone
-from typing import Annotated, Optional
+from typing import Annotated, Optional, Type
 
 import jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
+from pydantic import BaseModel
 from starlette import status
 
 from app.config import auth_config
-from app.repositories import RepositoryFactory
+from app.config.database import db
+from app.repositories import RepositoryFactory, LoadPlan, LoadPlans
+from app.schemas import ReaderDTO
 from app.schemas.relations import ReaderRelationDTO
 from app.schemas.utils import Token
+from app.utils.response_cache import reader_tag, response_cache
 
 
 class OAuth2Utility:
@@ -66,7 +70,11 @@ class OAuth2Utility:
             )
 
     @staticmethod
-    async def get_current_reader(token: Annotated[str, Depends(oauth2_scheme)]):
+    async def resolve_reader[T: BaseModel](token: str, name: str, plan: LoadPlan, schema: Type[T]) -> T:
+        """
+        The verified reader of the token as `schema`, reused for
+        READER_CACHE_TTL seconds until the reader's tag is invalidated.
+        """
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
@@ -76,14 +84,43 @@ class OAuth2Utility:
             payload = jwt.decode(
                 token, auth_config.JWT_SECRET, algorithms=[auth_config.JWT_ALGORITHM]
             )
-
-            db_reader = await RepositoryFactory.reader_repository().find(email=payload.get("sub"), verified=True)
-            if db_reader is None:
-                raise credentials_exception
-
-            reader = ReaderRelationDTO.model_validate(db_reader)
-
         except jwt.InvalidTokenError:
             raise credentials_exception
 
+        subject = payload.get("sub")
+        key = response_cache.key(name, subject)
+        # the version is taken before the read, so a reader read before an
+        # invalidation is never stored as current
+        cached, tag, version = await response_cache.load(key)
+        if cached is not None:
+            return schema.model_validate_json(cached)
+
+        with db.primary_reads():
+            db_reader = await RepositoryFactory.reader_repository().find(
+                plan=plan, email=subject, verified=True
+            )
+        if db_reader is None:
+            raise credentials_exception
+
+        reader = schema.model_validate(db_reader)
+        await response_cache.store(
+            key,
+            reader_tag(db_reader.id),
+            version if tag == reader_tag(db_reader.id) else None,
+            reader.model_dump_json(),
+            expire=auth_config.READER_CACHE_TTL,
+        )
         return reader
+
+    @staticmethod
+    async def get_current_reader(token: Annotated[str, Depends(oauth2_scheme)]) -> ReaderRelationDTO:
+        return await OAuth2Utility.resolve_reader(
+            token, "reader", LoadPlans.READER_RELATION, ReaderRelationDTO
+        )
+
+    @staticmethod
+    async def get_current_principal(token: Annotated[str, Depends(oauth2_scheme)]) -> ReaderDTO:
+        """Id, email and role of the reader, for dependencies that only authorize."""
+        return await OAuth2Utility.resolve_reader(
+            token, "principal", LoadPlans.READER, ReaderDTO
+        )
@@ -6,10 +6,18 @@ from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 
 from app.config.database import redis_db, EnumRedisDB
+from app.config.database.redis_config import redis_config
+from app.utils.jobs import run_jobs
+from app.utils.tiered_cache import MemoryTier, TieredBackend
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
     async with redis_db.get_connect(EnumRedisDB.CACHE) as redis:
-        FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
-        yield
+        backend = TieredBackend(
+            RedisBackend(redis),
+            MemoryTier(redis_config.LOCAL_CACHE_MAX_BYTES, redis_config.LOCAL_CACHE_TTL),
+        )
+        FastAPICache.init(backend, prefix="fastapi-cache")
+        async with backend.subscribed(), run_jobs():
+            yield
@@ -5,3 +5,8 @@ Forbidden = HTTPException(
     status_code=status.HTTP_403_FORBIDDEN,
     detail="You do not have permission to perform this action."
 )
+
+CommitFailed = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="The changes could not be saved, please try again."
+)
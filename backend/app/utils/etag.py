@@ -0,0 +1,63 @@
+import hashlib
+from typing import Any, Awaitable, Callable, Iterable
+
+from fastapi import Request, Response
+from prometheus_client import Counter
+from redis import RedisError
+from starlette import status
+
+from app.config.database import db
+from app.repositories.table_versions import table_versions
+
+CONDITIONAL_RESPONSES = Counter(
+    "conditional_responses_total", "Responses of ETag-aware routes", ["route", "result"]
+)
+
+
+def matches(if_none_match: str, etag: str) -> bool:
+    # weak comparison, as If-None-Match calls for
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def conditional(
+        request: Request,
+        models: Iterable[Any],
+        render: Callable[[], Awaitable[Response]],
+) -> Response:
+    """
+    The rendered response with a strong ETag built from the URL, the
+    caller's credentials and the versions of the tables it is read from,
+    or 304 Not Modified when the client already holds that version.
+    """
+    route = request.scope["route"].path
+    authorization = request.headers.get("authorization", "")
+
+    try:
+        # taken before reading, so the body is never older than its ETag
+        versions = await table_versions.versions(model.__tablename__ for model in models)
+    except RedisError:
+        CONDITIONAL_RESPONSES.labels(route, "unversioned").inc()
+        return await render()
+
+    query = sorted(request.query_params.multi_items())
+    digest = hashlib.sha1(f"{request.url.path}{query}{authorization}{versions}".encode()).hexdigest()
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache" if authorization else "no-cache",
+    }
+    if authorization:
+        headers["Vary"] = "Authorization"
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and matches(if_none_match, etag):
+        CONDITIONAL_RESPONSES.labels(route, "not_modified").inc()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    CONDITIONAL_RESPONSES.labels(route, "modified").inc()
+    # a replica behind the versions would render an older body under this ETag
+    with db.primary_reads():
+        response = await render()
+    response.headers.update(headers)
+    return response
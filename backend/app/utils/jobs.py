@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+from prometheus_client import Gauge
+
+from app.config.database import db_config
+from app.repositories import RepositoryFactory as RF
+from app.utils.response_cache import CATALOG_TAG, book_tag, response_cache
+
+COUNTERS_DRIFT = Gauge(
+    "book_counters_drift", "Books whose availability counters disagree with their copies"
+)
+
+logger = logging.getLogger("app.jobs")
+
+
+async def periodic(name: str, interval: float, job: Callable[[], Awaitable[Any]]):
+    while True:
+        # on the same wall-clock ticks in every worker, so jobs that take a lock
+        # (refresh_overdue_loans) run once per interval instead of once per worker
+        await asyncio.sleep(interval - time.time() % interval)
+        try:
+            await job()
+        except Exception:
+            logger.exception("Job %s failed", name)
+
+
+async def check_book_counters():
+    repository = RF.book_counters_repository()
+    drift = await repository.find_drift()
+    COUNTERS_DRIFT.set(len(drift))
+    if not drift:
+        return
+
+    logger.warning(
+        "Availability counters drifted for %s book(s), first ids: %s",
+        len(drift), [row.id for row in drift[:10]],
+    )
+    if db_config.COUNTERS_REPAIR:
+        repaired = await repository.repair([row.id for row in drift])
+        COUNTERS_DRIFT.set(len(drift) - len(repaired))
+        await response_cache.invalidate(CATALOG_TAG, *(book_tag(book_id) for book_id in repaired))
+
+
+async def refresh_overdue_loans():
+    await RF.overdue_loan_repository().refresh()
+
+
+@asynccontextmanager
+async def run_jobs() -> AsyncIterator[None]:
+    """Background jobs of the worker, cancelled on shutdown."""
+    jobs: list[tuple[str, Optional[float], Callable[[], Awaitable[Any]]]] = [
+        ("check_book_counters", db_config.COUNTERS_CHECK_INTERVAL, check_book_counters),
+        ("refresh_overdue_loans", db_config.OVERDUE_REFRESH_INTERVAL, refresh_overdue_loans),
+    ]
+    tasks = [
+        asyncio.create_task(periodic(name, interval, job))
+        for name, interval, job in jobs
+        if interval
+    ]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import logging
+import math
+import random
+import time
+from contextlib import suppress
+from functools import partial
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from fastapi import Request, Response
+from fastapi_cache import FastAPICache
+from prometheus_client import Counter
+from redis import RedisError
+from redis.asyncio.lock import Lock
+
+from app.config.database import db
+from app.config.database.redis_config import redis_config
+from app.repositories.table_versions import cache_backend
+from app.utils.single_flight import SingleFlight
+
+CATALOG_TAG = "catalog"
+# the version of a stored value that was read before its tag was known, never current
+UNVERIFIED = "-"
+
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "response_cache_lookups_total", "Response cache lookups by route", ["route", "result"]
+)
+
+logger = logging.getLogger(__name__)
+
+
+def book_tag(book_id: int) -> str:
+    return f"book:{book_id}"
+
+
+def reader_tag(reader_id: int) -> str:
+    return f"reader:{reader_id}"
+
+
+class ResponseCache:
+    """
+    JSON responses cached in the FastAPICache backend under the current
+    versions of their tags. Invalidating a tag gives it a new version, so
+    keys built from the old one are never read again and simply expire; a
+    response rendered from data older than the invalidation can't be stored
+    under the new version either.
+    """
+
+    def __init__(self, namespace: str = "response", expire: int = 3600):
+        self.namespace = namespace
+        self.expire = expire
+        self.single_flight = SingleFlight()
+
+    def tag_key(self, tag: str) -> str:
+        return f"{FastAPICache.get_prefix()}:{self.namespace}:tag:{tag}"
+
+    def response_key(self, request: Request, versions: List[str]) -> str:
+        query = sorted(request.query_params.multi_items())
+        digest = hashlib.sha1(f"{request.url.path}{query}{versions}".encode()).hexdigest()
+        return f"{FastAPICache.get_prefix()}:{self.namespace}:{digest}"
+
+    async def versions(self, tags: Iterable[str]) -> List[str]:
+        backend = FastAPICache.get_backend()
+        # a missing version, e.g. after Redis lost its data, must not repeat one handed out before
+        return [await backend.setdefault(self.tag_key(tag), uuid4().hex) for tag in tags] # type: ignore
+
+    async def response(
+            self,
+            request: Request,
+            tags: Iterable[str],
+            render: Callable[[], Awaitable[str]],
+    ) -> Response:
+        """
+        The cached JSON of the request, rendered and stored on a miss.
+        Concurrent misses of a key share one render, and a hit close to its
+        expiry may be rendered again early, see `expires_early`.
+        """
+        route = request.scope["route"].path
+        backend = FastAPICache.get_backend()
+
+        try:
+            key = self.response_key(request, await self.versions(tags))
+            cached = await backend.get(key)
+        except RedisError:
+            RESPONSE_CACHE_LOOKUPS.labels(route, "error").inc()
+            return Response(await render(), media_type="application/json")
+
+        if cached is not None:
+            expires_at, duration, body = self.unpack(cached) # type: ignore
+            if self.single_flight.in_flight(key) or not self.expires_early(expires_at, duration):
+                RESPONSE_CACHE_LOOKUPS.labels(route, "hit").inc()
+                return Response(body, media_type="application/json")
+
+            RESPONSE_CACHE_LOOKUPS.labels(route, "early_refresh").inc()
+            body = await self.single_flight.do(key, partial(self.fill, key, render, stale=body))
+            return Response(body, media_type="application/json")
+
+        result = "coalesced" if self.single_flight.in_flight(key) else "miss"
+        RESPONSE_CACHE_LOOKUPS.labels(route, result).inc()
+        body = await self.single_flight.do(key, partial(self.fill, key, render))
+        return Response(body, media_type="application/json")
+
+    def expires_early(self, expires_at: float, duration: float) -> bool:
+        # XFetch: the closer the expiry and the slower the render, the likelier
+        beta = redis_config.EARLY_REFRESH_BETA
+        return beta > 0 and time.time() - duration * beta * math.log(1 - random.random()) >= expires_at
+
+    @staticmethod
+    def unpack(cached: str) -> Tuple[float, float, str]:
+        try:
+            expires_at, duration, body = cached.split(" ", 2)
+            return float(expires_at), float(duration), body
+        except ValueError:
+            # stored without the refresh metadata, by a previous release
+            return math.inf, 0.0, cached
+
+    async def fill(self, key: str, render: Callable[[], Awaitable[str]], stale: Optional[str] = None) -> str:
+        """
+        Render and store the response of the key. With SINGLE_FLIGHT_LOCK only
+        one worker renders it: the others serve the stale body they have, or
+        wait for the stored one.
+        """
+        backend = FastAPICache.get_backend()
+        if stale is None:
+            # a flight that ended between our miss and this one may have stored it
+            with suppress(RedisError):
+                cached = await backend.get(key)
+                if cached is not None:
+                    return self.unpack(cached)[2] # type: ignore
+
+        if not redis_config.SINGLE_FLIGHT_LOCK:
+            return await self.compute(key, render)
+
+        lock = backend.lock(f"{key}:lock", redis_config.SINGLE_FLIGHT_LOCK_TIMEOUT) # type: ignore
+        try:
+            acquired = await lock.acquire(blocking=False)
+        except RedisError:
+            return await self.compute(key, render)
+
+        if not acquired:
+            if stale is not None:
+                return stale
+
+            body = await self.wait(key, lock)
+            return body if body is not None else await self.compute(key, render)
+
+        try:
+            # the previous holder may have stored it before releasing the lock
+            cached = None if stale is not None else await backend.get(key)
+            if cached is not None:
+                return self.unpack(cached)[2] # type: ignore
+            return await self.compute(key, render)
+        finally:
+            with suppress(RedisError):
+                await lock.release()
+
+    async def wait(self, key: str, lock: Lock) -> Optional[str]:
+        """The body stored by the lock holder, None if it gave up or took too long."""
+        backend = FastAPICache.get_backend()
+        deadline = time.monotonic() + redis_config.SINGLE_FLIGHT_WAIT
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                cached = await backend.get(key)
+                if cached is not None:
+                    return self.unpack(cached)[2] # type: ignore
+                if not await lock.locked():
+                    return None
+        except RedisError:
+            pass
+
+        return None
+
+    async def compute(self, key: str, render: Callable[[], Awaitable[str]]) -> str:
+        started = time.perf_counter()
+        # shared by every request of the flight, so in a unit of work of its own
+        async with db.unit_of_work():
+            with db.primary_reads():
+                body = await render()
+        duration = time.perf_counter() - started
+
+        try:
+            entry = f"{time.time() + self.expire:.3f} {duration:.4f} {body}"
+            await FastAPICache.get_backend().set(key, entry, expire=self.expire) # type: ignore
+        except RedisError:
+            pass
+
+        return body
+
+    def key(self, name: str, subject: str) -> str:
+        return f"{FastAPICache.get_prefix()}:{name}:{subject}"
+
+    async def load(self, key: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """
+        A value stored with `store`, None when missing or when its tag was
+        invalidated since, along with that tag and its current version.
+        """
+        try:
+            cached = await FastAPICache.get_backend().get(key)
+            if cached is None:
+                return None, None, None
+
+            tag, version, body = cached.split(" ", 2) # type: ignore
+            current, = await self.versions([tag])
+        except RedisError:
+            return None, None, None
+
+        return body if version == current else None, tag, current
+
+    async def store(self, key: str, tag: str, version: Optional[str], body: str, expire: int):
+        """
+        Store a value read after taking the `version` of its tag, unless the
+        tag was invalidated since. Without a version, the tag wasn't known
+        before the read: only the tag is kept, for the next read to take its
+        version first.
+        """
+        try:
+            current, = await self.versions([tag])
+            if version is None:
+                version, body = UNVERIFIED, ""
+            elif version != current:
+                return
+            await FastAPICache.get_backend().set(key, f"{tag} {version} {body}", expire=expire) # type: ignore
+        except RedisError:
+            pass
+
+    async def invalidate(self, *tags: str):
+        backend = cache_backend()
+        if backend is None:
+            return
+
+        try:
+            for tag in dict.fromkeys(tags):
+                await backend.replace(self.tag_key(tag), uuid4().hex) # type: ignore
+        except RedisError:
+            logger.warning("Response cache tags %s were not invalidated", tags)
+
+    async def invalidate_on_commit(self, *tags: str):
+        """Invalidate once the current unit of work commits, right away outside of one."""
+        await db.after_commit(partial(self.invalidate, *tags))
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,35 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Concurrent calls for the same key share one computation: the first
+    starts it, the others await its result (or its exception). The
+    computation runs as its own task, so a caller that gets cancelled
+    doesn't cancel it for the rest, and in an empty context: it must not
+    use the unit of work, or anything else, of the caller that started it.
+    """
+
+    def __init__(self):
+        self.flights: Dict[str, asyncio.Task] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self.flights
+
+    async def do[T](self, key: str, compute: Callable[[], Awaitable[T]]) -> T:
+        task = self.flights.get(key)
+        if task is None:
+            task = asyncio.create_task(compute(), context=contextvars.Context())
+            self.flights[key] = task
+            task.add_done_callback(lambda _: self.forget(key, task))
+
+        return await asyncio.shield(task)
+
+    def forget(self, key: str, task: asyncio.Task[Any]):
+        if self.flights.get(key) is task:
+            del self.flights[key]
+        # retrieved here, all of its callers may have been cancelled
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any, Optional, Tuple
+from uuid import uuid4
+
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.types import Backend
+from prometheus_client import Counter, Gauge
+from redis import RedisError
+from redis.asyncio.lock import Lock
+
+CACHE_TIER_LOOKUPS = Counter(
+    "cache_tier_lookups_total", "Cache lookups answered or missed by a tier", ["tier", "result"]
+)
+CACHE_TIER_EVICTIONS = Counter(
+    "cache_tier_evictions_total", "Entries dropped from a tier", ["tier", "reason"]
+)
+CACHE_TIER_BYTES = Gauge("cache_tier_memory_bytes", "Size of the values held by the memory tier")
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryTier:
+    """
+    Worker-local LRU of cache values bounded by their total size, every
+    entry expires after at most `ttl` seconds.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: OrderedDict[str, Tuple[float, Any, int]] = OrderedDict()
+        self.size = 0
+        # bumped on every invalidation, see TieredBackend.fill
+        self.generation = 0
+        # the generation of the last invalidation of each key, the oldest are
+        # forgotten past `max_invalidated` and then count as invalidated at `horizon`
+        self.invalidated: OrderedDict[str, int] = OrderedDict()
+        self.max_invalidated = 10_000
+        self.horizon = 0
+        CACHE_TIER_BYTES.set_function(lambda: self.size)
+
+    def get(self, key: str) -> Tuple[float, Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            CACHE_TIER_LOOKUPS.labels("memory", "miss").inc()
+            return 0, None
+
+        expires_at, value, _ = entry
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            self.discard(key, "expired")
+            CACHE_TIER_LOOKUPS.labels("memory", "miss").inc()
+            return 0, None
+
+        self.entries.move_to_end(key)
+        CACHE_TIER_LOOKUPS.labels("memory", "hit").inc()
+        return remaining, value
+
+    def set(self, key: str, value: Any, expire: Optional[float] = None):
+        size = len(value) if isinstance(value, (str, bytes)) else 0
+        if size > self.max_bytes:
+            return
+
+        self.discard(key)
+        ttl = min(expire, self.ttl) if expire and expire > 0 else self.ttl
+        self.entries[key] = (time.monotonic() + ttl, value, size)
+        self.size += size
+
+        while self.size > self.max_bytes:
+            oldest = next(iter(self.entries))
+            self.discard(oldest, "size")
+
+    def discard(self, key: str, reason: Optional[str] = None):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+
+        self.size -= entry[2]
+        if reason is not None:
+            CACHE_TIER_EVICTIONS.labels("memory", reason).inc()
+
+    def invalidate(self, key: Optional[str] = None, namespace: Optional[str] = None):
+        self.generation += 1
+        if key is not None:
+            self.invalidated[key] = self.generation
+            self.invalidated.move_to_end(key)
+            if len(self.invalidated) > self.max_invalidated:
+                _, generation = self.invalidated.popitem(last=False)
+                self.horizon = max(self.horizon, generation)
+            self.discard(key, "invalidated")
+            return
+
+        self.horizon = self.generation
+        for name in [name for name in self.entries if namespace is None or name.startswith(f"{namespace}:")]:
+            self.discard(name, "invalidated")
+
+    def invalidated_since(self, key: str, generation: int) -> bool:
+        return max(self.horizon, self.invalidated.get(key, 0)) > generation
+
+
+class TieredBackend(Backend):
+    """
+    FastAPICache backend answering from worker memory first and from Redis
+    on a miss. Values are written to both; a value that replaces one other
+    workers may hold is written with `replace`, which announces the key on
+    a pub/sub channel so they drop their local copy.
+    """
+
+    def __init__(self, redis_backend: RedisBackend, memory: MemoryTier, channel: str = "fastapi-cache:invalidate"):
+        self.redis_backend = redis_backend
+        self.memory = memory
+        self.channel = channel
+        self.node = uuid4().hex
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        remaining, value = self.memory.get(key)
+        if value is not None:
+            return int(remaining), value
+
+        return await self.fill(key)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return (await self.get_with_ttl(key))[1]
+
+    async def fill(self, key: str) -> Tuple[int, Optional[bytes]]:
+        generation = self.memory.generation
+        ttl, value = await self.redis_backend.get_with_ttl(key)
+        if value is None:
+            CACHE_TIER_LOOKUPS.labels("redis", "miss").inc()
+            return 0, None
+
+        CACHE_TIER_LOOKUPS.labels("redis", "hit").inc()
+        # an invalidation of the key that arrived during the round trip may concern this value
+        if not self.memory.invalidated_since(key, generation):
+            self.memory.set(key, value, ttl)
+        return ttl, value
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        """
+        For keys that embed the versions of what their value depends on, or
+        whose value carries them: those are never replaced by a value the
+        other workers must see, so nothing is announced.
+        """
+        await self.redis_backend.set(key, value, expire)
+        self.memory.set(key, value, expire)
+
+    async def setdefault(self, key: str, value: str) -> str:
+        """The value of the key, stored first as `value` when it is missing, e.g. a version."""
+        current = await self.get(key)
+        if current is not None:
+            return current # type: ignore
+
+        generation = self.memory.generation
+        redis = self.redis_backend.redis
+        # whoever stores it first wins, everyone uses the stored value
+        if not await redis.set(key, value, nx=True):
+            value = await redis.get(key) or value
+        if not self.memory.invalidated_since(key, generation):
+            self.memory.set(key, value)
+        return value
+
+    async def replace(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        """Write a value the other workers may hold an older one of, e.g. a version."""
+        await self.redis_backend.set(key, value, expire) # type: ignore
+        self.memory.invalidate(key=key)
+        self.memory.set(key, value, expire)
+        await self.publish(key=key)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        cleared = await self.redis_backend.clear(namespace, key)
+        self.memory.invalidate(key=key, namespace=namespace)
+        await self.publish(key=key, namespace=namespace)
+        return cleared
+
+    def lock(self, name: str, timeout: float) -> Lock:
+        return self.redis_backend.redis.lock(name, timeout=timeout)
+
+    async def publish(self, **message: Optional[str]):
+        await self.redis_backend.redis.publish(self.channel, json.dumps({"node": self.node, **message}))
+
+    def on_message(self, data: str | bytes):
+        message = json.loads(data)
+        if message["node"] != self.node:
+            self.memory.invalidate(key=message.get("key"), namespace=message.get("namespace"))
+
+    async def listen(self):
+        while True:
+            try:
+                async with self.redis_backend.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    # announcements sent while unsubscribed are lost
+                    self.memory.invalidate(namespace=None)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.on_message(message["data"])
+            except (RedisError, OSError):
+                logger.warning("Cache invalidation channel lost, retrying", exc_info=True)
+                self.memory.invalidate(namespace=None)
+                await asyncio.sleep(1)
+
+    @asynccontextmanager
+    async def subscribed(self) -> AsyncIterator[None]:
+        task = asyncio.create_task(self.listen())
+        try:
+            yield
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
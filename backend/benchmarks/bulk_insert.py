@@ -0,0 +1,68 @@
+"""
+Inserting 10k book copies: ORM objects with session.add_all (the former
+create_multiple), create_multiple (Core INSERT ... RETURNING) and
+copy_multiple (COPY). Every run is rolled back.
+
+    cd backend && PYTHONPATH=. python benchmarks/bulk_insert.py
+
+PostgreSQL 16 on localhost, best of 5, with the availability counter
+triggers of book_copies:
+    add_all           10000 rows 17931.6 ms
+    create_multiple   10000 rows   307.1 ms
+    copy_multiple     10000 rows   207.6 ms
+
+add_all flushes one INSERT per row here, so the statement-level counter
+trigger also runs once per row.
+"""
+import asyncio
+import time
+import uuid
+
+from app.config.database import db
+from app.models import BookCopyORM
+from app.repositories import RepositoryFactory as RF
+
+ROWS = 10_000
+RUNS = 5
+
+
+class Rollback(Exception):
+    pass
+
+
+async def add_all(data):
+    async with db.transaction() as session:
+        session.add_all([BookCopyORM(**row) for row in data])
+
+
+async def create_multiple(data):
+    await RF.book_copy_repository().create_multiple(data)
+
+
+async def copy_multiple(data):
+    await RF.book_copy_repository().copy_multiple(data)
+
+
+async def measure(insert, book_id: int) -> float:
+    data = [{"serial_num": uuid.uuid4().hex, "book_id": book_id} for _ in range(ROWS)]
+    started = time.perf_counter()
+    try:
+        async with db.unit_of_work():
+            await insert(data)
+            elapsed = time.perf_counter() - started
+            raise Rollback
+    except Rollback:
+        return elapsed
+
+
+async def main():
+    async with db.session() as session:
+        book_id = (await session.execute(BookCopyORM.__table__.select().limit(1))).first().book_id
+
+    for insert in (add_all, create_multiple, copy_multiple):
+        best = min([await measure(insert, book_id) for _ in range(RUNS)])
+        print(f"{insert.__name__:<17} {ROWS} rows {best * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""
+A page of BookRelationDTO (copies and their histories nested) rendered to
+JSON three ways:
+- orm: ORM objects, model_validate per book, then the response model
+  validated again (the former list endpoint)
+- rows: find_all_rows and RowLoader.construct, as the other list endpoints
+- json: built by PostgreSQL (BookService.get_multi_json)
+Books are added until the table holds 10k; they are rolled back at the end.
+
+    cd backend && PYTHONPATH=. python benchmarks/row_dtos.py
+
+PostgreSQL 16 on localhost, mean of 5 runs:
+       100 rows: orm     62.0 ms  rows     27.4 ms  json     17.0 ms
+      1000 rows: orm    534.0 ms  rows    191.7 ms  json     60.8 ms
+     10000 rows: orm   6461.4 ms  rows   2689.2 ms  json    902.8 ms
+"""
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.config.database import db
+from app.repositories import LoadPlans
+from app.repositories.row_loader import RowLoader
+from app.schemas import MultiDTO
+from app.schemas.relations import BookRelationDTO
+from app.schemas.utils import CountStrategy, Pagination
+from app.deps import Deps
+
+SIZES = (100, 1_000, 10_000)
+RUNS = 5
+
+SEED = text(
+    """
+    WITH books AS (
+        INSERT INTO books (title, author, publisher, year_publication)
+        SELECT 'Benchmark ' || g, 'Author', 'Publisher', 2000
+        FROM generate_series(1, greatest(:total - (SELECT count(*) FROM books), 0)) g
+        RETURNING id
+    )
+    INSERT INTO book_copies (serial_num, book_id, status, access_type)
+    SELECT 'bench-' || id || '-' || n, id, 'AVAILABLE', 'TAKE_HOME'
+    FROM books, generate_series(1, 3) n
+    """
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+async def orm(pg: Pagination) -> str:
+    books, total = await Deps.book_service().book_repository.find_all(pg=pg, plan=LoadPlans.BOOK_RELATION)
+    page = MultiDTO(items=[BookRelationDTO.model_validate(book) for book in books], total=total)
+    return MultiDTO[BookRelationDTO].model_validate(page.model_dump()).model_dump_json()
+
+
+async def rows(pg: Pagination) -> str:
+    books, total = await Deps.book_service().book_repository.find_all_rows(
+        LoadPlans.BOOK_RELATION.projection(None, pg.order_by), pg=pg
+    )
+    page = MultiDTO(items=[RowLoader.construct(BookRelationDTO, row) for row in books], total=total)
+    return page.model_dump_json()
+
+
+async def json(pg: Pagination) -> str:
+    return await Deps.book_service().get_multi_json(pg)
+
+
+async def main():
+    try:
+        async with db.unit_of_work():
+            async with db.transaction() as session:
+                await session.execute(SEED, {"total": max(SIZES)})
+
+            for size in SIZES:
+                # past MAX_LIMIT on purpose
+                pg = Pagination.model_construct(
+                    limit=size, offset=0, order_by="id", after=None, count=CountStrategy.EXACT
+                )
+                timings = []
+                for render in (orm, rows, json):
+                    await render(pg)
+                    started = time.perf_counter()
+                    for _ in range(RUNS):
+                        await render(pg)
+                    timings.append(f"{render.__name__} {(time.perf_counter() - started) / RUNS * 1000:8.1f} ms")
+                print(f"{size:>6} rows: " + "  ".join(timings))
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+"""
+Python overhead of preparing the find_all page query of REQUEST_RELATION
+(two filters, window count): built on every call versus taken from the
+repository's StatementCache. Both include the cache key SQLAlchemy
+generates to look up the compiled statement. No database is needed.
+
+    cd backend && PYTHONPATH=. python benchmarks/statement_cache.py
+
+Python 3.12, SQLAlchemy 2.0.44, 20000 calls:
+    rebuilt     255.5 us/call
+    cached        4.3 us/call
+"""
+import timeit
+
+from app.models import RequestORM
+from app.repositories import LoadPlans
+from app.repositories.sqlalchemy import SqlAlchemyRepository
+from app.schemas.utils import Pagination
+
+CALLS = 20_000
+
+repository = SqlAlchemyRepository(RequestORM)
+plan = LoadPlans.REQUEST_RELATION
+pg = Pagination(limit=20, offset=0, order_by="created_at") # type: ignore
+filter_keys = ("book_id", "status")
+key_column, pk_column = repository.get_sort_columns(pg.order_by)
+
+
+def build():
+    base = (
+        repository.filtered(filter_keys)
+        .options(*plan.options)
+        .execution_options(populate_existing=True)
+    )
+    return repository.build_page_query(base, key_column, pk_column, False, True)
+
+
+def rebuilt():
+    build()._generate_cache_key()
+
+
+def cached():
+    key = (repository.model.__name__, "find_all", plan, filter_keys, key_column.key, False, False, True)
+    repository.statements.get(key, build)._generate_cache_key()
+
+
+if __name__ == "__main__":
+    for prepare in (rebuilt, cached):
+        seconds = timeit.timeit(prepare, number=CALLS)
+        print(f"{prepare.__name__:<9} {seconds / CALLS * 1e6:7.1f} us/call")
@@ -0,0 +1,63 @@
+"""add lookup indexes
+
+Revision ID: a3c91f0e5b27
+Revises: 78f4e98bea22
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c91f0e5b27"
+down_revision: Union[str, Sequence[str], None] = "78f4e98bea22"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_book_copies_book_id_status",
+        "book_copies",
+        ["book_id", "status"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_histories_copy_id"), "histories", ["copy_id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_loans_copy_id"), "loans", ["copy_id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_loans_due_date"), "loans", ["due_date"], unique=False
+    )
+    op.create_index(
+        op.f("ix_loans_reader_id"), "loans", ["reader_id"], unique=False
+    )
+    op.create_index(
+        "ix_requests_book_id_status_created_at",
+        "requests",
+        ["book_id", "status", "created_at"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_requests_reader_id"), "requests", ["reader_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_requests_reader_id"), table_name="requests")
+    op.drop_index(
+        "ix_requests_book_id_status_created_at", table_name="requests"
+    )
+    op.drop_index(op.f("ix_loans_reader_id"), table_name="loans")
+    op.drop_index(op.f("ix_loans_due_date"), table_name="loans")
+    op.drop_index(op.f("ix_loans_copy_id"), table_name="loans")
+    op.drop_index(op.f("ix_histories_copy_id"), table_name="histories")
+    op.drop_index("ix_book_copies_book_id_status", table_name="book_copies")
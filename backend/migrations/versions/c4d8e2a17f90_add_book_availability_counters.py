@@ -0,0 +1,161 @@
+"""add book availability counters
+
+Revision ID: c4d8e2a17f90
+Revises: a3c91f0e5b27
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4d8e2a17f90"
+down_revision: Union[str, Sequence[str], None] = "a3c91f0e5b27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = (
+    "available_count",
+    "reserved_count",
+    "borrowed_count",
+    "queue_length",
+)
+
+# transition tables of every event and the rows of the statement with +1
+# for what appeared and -1 for what disappeared
+DELTAS = {
+    "INSERT": (
+        "NEW TABLE AS new_rows",
+        "SELECT book_id, status, 1 AS sign FROM new_rows",
+    ),
+    "DELETE": (
+        "OLD TABLE AS old_rows",
+        "SELECT book_id, status, -1 AS sign FROM old_rows",
+    ),
+    "UPDATE": (
+        "NEW TABLE AS new_rows OLD TABLE AS old_rows",
+        "SELECT book_id, status, 1 AS sign FROM new_rows "
+        "UNION ALL SELECT book_id, status, -1 FROM old_rows",
+    ),
+}
+
+# statement level triggers, so a COPY or a catalog import updates every
+# touched book once with the summed delta of the whole statement
+COPY_COUNTERS = """
+CREATE FUNCTION book_copies_{event}_counters() RETURNS trigger AS $$
+BEGIN
+    UPDATE books b SET
+        available_count = b.available_count + d.available,
+        reserved_count = b.reserved_count + d.reserved,
+        borrowed_count = b.borrowed_count + d.borrowed
+    FROM (
+        SELECT book_id,
+            coalesce(sum(sign) FILTER (WHERE status = 'AVAILABLE'), 0)
+                AS available,
+            coalesce(sum(sign) FILTER (WHERE status = 'RESERVED'), 0)
+                AS reserved,
+            coalesce(sum(sign) FILTER (WHERE status = 'BORROWED'), 0)
+                AS borrowed
+        FROM ({delta}) changed
+        GROUP BY book_id
+    ) d
+    WHERE b.id = d.book_id
+      AND (d.available <> 0 OR d.reserved <> 0 OR d.borrowed <> 0);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+REQUEST_COUNTERS = """
+CREATE FUNCTION requests_{event}_counters() RETURNS trigger AS $$
+BEGIN
+    UPDATE books b SET queue_length = b.queue_length + d.queued
+    FROM (
+        SELECT book_id, sum(sign) AS queued
+        FROM ({delta}) changed
+        WHERE status = 'QUEUED'
+        GROUP BY book_id
+    ) d
+    WHERE b.id = d.book_id AND d.queued <> 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+BACKFILL = """
+UPDATE books b SET
+    available_count = coalesce(c.available, 0),
+    reserved_count = coalesce(c.reserved, 0),
+    borrowed_count = coalesce(c.borrowed, 0),
+    queue_length = coalesce(r.queued, 0)
+FROM books x
+LEFT JOIN (
+    SELECT book_id,
+        count(*) FILTER (WHERE status = 'AVAILABLE') AS available,
+        count(*) FILTER (WHERE status = 'RESERVED') AS reserved,
+        count(*) FILTER (WHERE status = 'BORROWED') AS borrowed
+    FROM book_copies
+    GROUP BY book_id
+) c ON c.book_id = x.id
+LEFT JOIN (
+    SELECT book_id, count(*) AS queued
+    FROM requests
+    WHERE status = 'QUEUED'
+    GROUP BY book_id
+) r ON r.book_id = x.id
+WHERE b.id = x.id
+"""
+
+
+def create_triggers(table: str, template: str) -> None:
+    for event, (referencing, delta) in DELTAS.items():
+        name = f"{table}_{event.lower()}_counters"
+        op.execute(template.format(event=event.lower(), delta=delta))
+        op.execute(
+            f"CREATE TRIGGER {name} AFTER {event} ON {table} "
+            f"REFERENCING {referencing} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION {name}()"
+        )
+
+
+def drop_triggers(table: str) -> None:
+    for event in DELTAS:
+        name = f"{table}_{event.lower()}_counters"
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS {name}()")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in COUNTERS:
+        op.add_column(
+            "books",
+            sa.Column(
+                column, sa.Integer(), server_default="0", nullable=False
+            ),
+        )
+    op.create_index(
+        op.f("ix_books_available_count"),
+        "books",
+        ["available_count"],
+        unique=False,
+    )
+
+    # the lock keeps copies and requests still while the counters are built
+    op.execute("LOCK TABLE book_copies, requests IN SHARE MODE")
+    op.execute(BACKFILL)
+    create_triggers("book_copies", COPY_COUNTERS)
+    create_triggers("requests", REQUEST_COUNTERS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_triggers("requests")
+    drop_triggers("book_copies")
+    op.drop_index(op.f("ix_books_available_count"), table_name="books")
+    for column in reversed(COUNTERS):
+        op.drop_column("books", column)
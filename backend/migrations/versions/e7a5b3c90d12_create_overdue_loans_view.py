@@ -0,0 +1,55 @@
+"""create overdue loans view
+
+Revision ID: e7a5b3c90d12
+Revises: c4d8e2a17f90
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a5b3c90d12"
+down_revision: Union[str, Sequence[str], None] = "c4d8e2a17f90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW overdue_loans AS
+        SELECT l.id, l.reader_id,
+            coalesce(p.full_name, r.email) AS reader_name,
+            r.email AS reader_email,
+            l.copy_id, c.book_id, b.title AS book_title,
+            l.issue_date, l.due_date,
+            current_date - l.due_date::date AS days_overdue
+        FROM loans l
+        JOIN readers r ON r.id = l.reader_id
+        LEFT JOIN profiles p ON p.reader_id = l.reader_id
+        JOIN book_copies c ON c.serial_num = l.copy_id
+        JOIN books b ON b.id = c.book_id
+        WHERE l.return_date IS NULL AND l.due_date < now()
+        """
+    )
+    # REFRESH ... CONCURRENTLY needs a unique index on the view
+    op.create_index(
+        op.f("ix_overdue_loans_id"), "overdue_loans", ["id"], unique=True
+    )
+    op.create_index(
+        op.f("ix_overdue_loans_due_date"),
+        "overdue_loans",
+        ["due_date"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS overdue_loans")
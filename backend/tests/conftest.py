@@ -0,0 +1,118 @@
+import uuid
+from typing import List, Tuple
+
+import pytest
+from sqlalchemy import exc, text
+
+from app.config.database import db
+
+
+@pytest.fixture(autouse=True)
+async def database():
+    """Tests run against the configured PostgreSQL with the migrations applied."""
+    try:
+        async with db.engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    except (exc.SQLAlchemyError, OSError):
+        pytest.skip("PostgreSQL is not available")
+
+    yield db
+
+    # pooled connections belong to the event loop of the test that opened them
+    await db.engine.dispose()
+    if db.replica_engine is not None:
+        await db.replica_engine.dispose()
+
+
+class Rollback(Exception):
+    pass
+
+
+@pytest.fixture
+async def unit_of_work(database):
+    """A unit of work around the test that is rolled back, whatever the test wrote."""
+    try:
+        async with database.unit_of_work() as unit_of_work:
+            yield unit_of_work
+            raise Rollback
+    except Rollback:
+        pass
+
+
+class Library:
+    """
+    Books, copies and readers committed for tests that run concurrent units
+    of work, deleted again with everything that references them.
+    """
+
+    def __init__(self, database):
+        self.db = database
+        self.marker = uuid.uuid4().hex[:12]
+        self.book_ids: List[int] = []
+        self.reader_ids: List[int] = []
+
+    async def book(self, copies: int, status: str = "AVAILABLE") -> Tuple[int, List[str]]:
+        async with self.db.transaction() as session:
+            book_id = (await session.execute(
+                text(
+                    "INSERT INTO books (title, author, publisher, year_publication) "
+                    "VALUES ('Test book', :marker, 'Test', 2000) RETURNING id"
+                ),
+                {"marker": self.marker},
+            )).scalar_one()
+            serials = (await session.execute(
+                text(
+                    "INSERT INTO book_copies (serial_num, book_id, status, access_type) "
+                    "SELECT :prefix || n, :book_id, "
+                    "CAST(:status AS bookcopystatus), 'TAKE_HOME' "
+                    "FROM generate_series(1, :copies) n RETURNING serial_num"
+                ),
+                {"prefix": f"{self.marker}-{book_id}-", "book_id": book_id, "status": status, "copies": copies},
+            )).scalars().all()
+
+        self.book_ids.append(book_id)
+        return book_id, list(serials)
+
+    async def readers(self, count: int, full_name: str = "Иванов Иван") -> List[int]:
+        async with self.db.transaction() as session:
+            ids = (await session.execute(
+                text(
+                    "INSERT INTO readers (email, role, encrypted_password, verified) "
+                    "SELECT :marker || '-' || n || '@example.com', 'READER', 'x', true "
+                    "FROM generate_series(1, :count) n RETURNING id"
+                ),
+                {"marker": f"{self.marker}-{len(self.reader_ids)}", "count": count},
+            )).scalars().all()
+            await session.execute(
+                text("INSERT INTO profiles (reader_id, full_name) SELECT unnest(CAST(:ids AS int[])), :full_name"),
+                {"ids": list(ids), "full_name": full_name},
+            )
+
+        self.reader_ids.extend(ids)
+        return list(ids)
+
+    async def scalar(self, statement: str, **params):
+        async with self.db.get_session() as session:
+            return (await session.execute(text(statement), params)).scalar()
+
+    async def cleanup(self):
+        params = {"books": self.book_ids, "readers": self.reader_ids}
+        copies = "SELECT serial_num FROM book_copies WHERE book_id = ANY(:books)"
+        async with self.db.transaction() as session:
+            for statement in (
+                f"DELETE FROM loans WHERE reader_id = ANY(:readers) OR copy_id IN ({copies})",
+                f"DELETE FROM histories WHERE copy_id IN ({copies})",
+                "DELETE FROM requests WHERE reader_id = ANY(:readers) OR book_id = ANY(:books)",
+                "DELETE FROM book_copies WHERE book_id = ANY(:books)",
+                "DELETE FROM books WHERE id = ANY(:books)",
+                "DELETE FROM profiles WHERE reader_id = ANY(:readers)",
+                "DELETE FROM readers WHERE id = ANY(:readers)",
+            ):
+                await session.execute(text(statement), params)
+
+
+@pytest.fixture
+async def library(database):
+    library = Library(database)
+    yield library
+    await library.cleanup()
@@ -0,0 +1,43 @@
+import pytest
+
+from app.config.database import db
+
+
+class Failure(Exception):
+    pass
+
+
+async def test_outside_a_unit_of_work_coroutine_callbacks_are_awaited():
+    done = []
+
+    async def callback():
+        done.append("async")
+
+    await db.after_commit(callback)
+    await db.after_commit(lambda: done.append("sync"))
+
+    assert done == ["async", "sync"]
+
+
+async def test_callbacks_run_once_the_unit_of_work_commits(database):
+    done = []
+
+    async def callback():
+        done.append("committed")
+
+    async with database.unit_of_work():
+        await database.after_commit(callback)
+        assert done == []
+
+    assert done == ["committed"]
+
+
+async def test_callbacks_of_a_rolled_back_unit_of_work_never_run(database):
+    done = []
+
+    with pytest.raises(Failure):
+        async with database.unit_of_work():
+            await database.after_commit(lambda: done.append("committed"))
+            raise Failure
+
+    assert done == []
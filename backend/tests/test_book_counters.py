@@ -0,0 +1,105 @@
+import json
+from typing import Tuple
+
+from sqlalchemy import text
+
+from app.config.database import db
+from app.deps import Deps
+from app.models.types import BookAccessType
+from app.repositories import RepositoryFactory
+from app.schemas.book import BookCopyCreateDTO, ImportFormat
+
+
+async def counters(library, book_id: int) -> Tuple[int, int, int, int]:
+    """available, reserved, borrowed, queued"""
+    return tuple(await library.scalar(
+        "SELECT array[available_count, reserved_count, borrowed_count, queue_length] FROM books WHERE id = :id",
+        id=book_id,
+    ))
+
+
+async def test_copy_inserts_and_deletes(library):
+    book_id, _ = await library.book(copies=0)
+    serials = [f"{library.marker}-new-{n}" for n in range(3)]
+
+    async with db.unit_of_work():
+        await Deps.book_service().add_copies(book_id, [
+            BookCopyCreateDTO(serial_num=serial, access_type=BookAccessType.TAKE_HOME) for serial in serials
+        ])
+    assert await counters(library, book_id) == (3, 0, 0, 0)
+
+    async with db.unit_of_work():
+        await Deps.book_service().delete_copies(serials[:1])
+    assert await counters(library, book_id) == (2, 0, 0, 0)
+
+
+async def test_copy_import(library):
+    lines = [
+        {
+            "title": f"Imported {n}", "author": library.marker, "publisher": "Test", "year_publication": 2000,
+            "copies": [
+                {"serial_num": f"{library.marker}-import-{n}-{c}", "access_type": "TAKE_HOME"} for c in range(n)
+            ],
+        }
+        for n in (1, 2)
+    ]
+
+    async def stream():
+        yield "\n".join(json.dumps(line) for line in lines).encode()
+
+    async with db.unit_of_work():
+        await Deps.book_service().import_books(stream(), ImportFormat.JSONL)
+
+    imported = await library.scalar(
+        "SELECT array_agg(id ORDER BY title) FROM books WHERE author = :marker", marker=library.marker
+    )
+    library.book_ids.extend(imported)
+    assert [await counters(library, book_id) for book_id in imported] == [(1, 0, 0, 0), (2, 0, 0, 0)]
+
+
+async def test_claims(library):
+    book_id, _ = await library.book(copies=3)
+    book_service = Deps.book_service()
+
+    async with db.unit_of_work():
+        await book_service.reserve_copy(book_id)
+        await book_service.reserve_copy(book_id)
+    assert await counters(library, book_id) == (1, 2, 0, 0)
+
+    async with db.unit_of_work():
+        await book_service.borrow_copy(book_id, "Иван")
+    assert await counters(library, book_id) == (1, 1, 1, 0)
+
+    async with db.unit_of_work():
+        await book_service.release_copy(book_id)
+    assert await counters(library, book_id) == (2, 0, 1, 0)
+
+
+async def test_queue_and_return_to_the_waitlist(library):
+    book_id, (serial_num,) = await library.book(copies=1, status="BORROWED")
+    readers = await library.readers(2)
+
+    for reader_id in readers:
+        async with db.unit_of_work():
+            await Deps.request_service().create_request(reader_id, book_id)
+    assert await counters(library, book_id) == (0, 0, 1, 2)
+
+    async with db.unit_of_work():
+        await Deps.book_service().return_copy(serial_num)
+    assert await counters(library, book_id) == (0, 1, 0, 1)
+
+
+async def test_drift_is_found_and_repaired(library):
+    book_id, _ = await library.book(copies=2)
+    async with db.transaction() as session:
+        await session.execute(
+            text("UPDATE books SET available_count = 7, queue_length = 1 WHERE id = :id"), {"id": book_id}
+        )
+    repository = RepositoryFactory.book_counters_repository()
+
+    drift = {row.id: row for row in await repository.find_drift(limit=100_000)}
+    assert (drift[book_id].available_count, drift[book_id].available) == (7, 2)
+
+    assert await repository.repair([book_id]) == [book_id]
+    assert await counters(library, book_id) == (2, 0, 0, 0)
+    assert book_id not in {row.id for row in await repository.find_drift(limit=100_000)}
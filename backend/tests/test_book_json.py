@@ -0,0 +1,80 @@
+import json
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app.deps import Deps
+from app.repositories import LoadPlans
+from app.schemas import MultiDTO
+from app.schemas.relations import BookRelationDTO
+from app.schemas.utils import CountStrategy, Fields, Pagination
+from app.schemas.utils.filters import BookFilter
+
+SEED = text(
+    """
+    WITH books AS (
+        INSERT INTO books (title, author, publisher, year_publication)
+        SELECT 'Книга ' || (g % 4), :author, 'Издательство', 1990 + g % 3
+        FROM generate_series(1, 12) g
+        RETURNING id
+    ), copies AS (
+        INSERT INTO book_copies (serial_num, book_id, status, access_type)
+        SELECT :author || '-' || id || '-' || n, id, 'AVAILABLE', 'TAKE_HOME'
+        FROM books, generate_series(1, 3) n
+        WHERE id % 4 <> 0
+        RETURNING serial_num
+    )
+    INSERT INTO histories (copy_id, name, borrowed_at, borrowed_to)
+    SELECT serial_num, 'Иван', date '2024-01-01', CASE WHEN right(serial_num, 1) = '1' THEN date '2024-01-15' END
+    FROM copies
+    """
+)
+
+
+@pytest.fixture
+async def book_filter(unit_of_work):
+    author = f"json-{uuid.uuid4().hex}"
+    session = unit_of_work.get_session(write=True)
+    await session.execute(SEED, {"author": author})
+    return BookFilter(author=author, publisher=None, year_publication=None, available=None)
+
+
+async def orm_page(pg: Pagination, book_filter: BookFilter) -> dict:
+    books, total = await Deps.book_service().book_repository.find_all(
+        pg=pg, plan=LoadPlans.BOOK_RELATION, conditions=book_filter.conditions
+    )
+    page = MultiDTO[BookRelationDTO](
+        items=[BookRelationDTO.model_validate(book) for book in books],
+        total=total,
+        next_cursor=pg.next_cursor(books),
+    )
+    return json.loads(page.model_dump_json())
+
+
+@pytest.mark.parametrize("order_by", ["id", "title", "year_publication"])
+@pytest.mark.parametrize("count", list(CountStrategy))
+async def test_json_page_equals_orm_dtos(book_filter, order_by, count):
+    pg = Pagination(limit=5, offset=2, order_by=order_by, after=None, count=count)
+    expected = await orm_page(pg, book_filter)
+    assert len(expected["items"]) == 5
+
+    body = await Deps.book_service().get_multi_json(pg, book_filters=book_filter)
+    assert json.loads(body) == expected
+
+    # the next page, by cursor
+    pg = Pagination(limit=5, offset=0, order_by=order_by, after=expected["next_cursor"], count=count)
+    expected = await orm_page(pg, book_filter)
+    body = await Deps.book_service().get_multi_json(pg, book_filters=book_filter)
+    assert json.loads(body) == expected
+
+
+async def test_json_page_keeps_selected_fields(book_filter):
+    pg = Pagination(limit=3, offset=0, order_by="id", after=None, count=CountStrategy.NONE)
+    full = await orm_page(pg, book_filter)
+    assert full["items"]
+    body = await Deps.book_service().get_multi_json(pg, book_filters=book_filter, fields=Fields(fields="title,copies"))
+
+    assert json.loads(body)["items"] == [
+        {"title": book["title"], "copies": book["copies"]} for book in full["items"]
+    ]
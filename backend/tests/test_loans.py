@@ -0,0 +1,70 @@
+import asyncio
+from collections import Counter
+
+from fastapi import HTTPException
+
+from app.config.database import db
+from app.deps import Deps
+from app.schemas.loan import LoanCreateDTO
+
+BOOKS = 40
+COPIES = 3
+CONCURRENCY = 400
+
+
+async def test_parallel_loans_borrow_each_reserved_copy_once(library):
+    book_ids = [(await library.book(copies=COPIES, status="RESERVED"))[0] for _ in range(BOOKS)]
+    readers = await library.readers(50) + await library.readers(50, full_name="Иван")
+
+    async def give(i: int):
+        async with db.unit_of_work():
+            try:
+                await Deps.loan_service().create_loan(
+                    LoanCreateDTO(reader_id=readers[i % len(readers)], book_id=book_ids[i % BOOKS])
+                )
+                return "loan"
+            except HTTPException as error:
+                return error.status_code
+
+    results = Counter(await asyncio.gather(*(give(i) for i in range(CONCURRENCY))))
+
+    assert results == {"loan": BOOKS * COPIES, 404: CONCURRENCY - BOOKS * COPIES}
+
+    loans, copies = (await library.scalar(
+        "SELECT array[count(*), count(DISTINCT copy_id)] FROM loans WHERE reader_id = ANY(:readers)",
+        readers=readers,
+    ))
+    assert loans == copies == BOOKS * COPIES
+    assert await library.scalar(
+        "SELECT count(*) FROM book_copies WHERE book_id = ANY(:books) AND status <> 'BORROWED'",
+        books=book_ids,
+    ) == 0
+    # one history entry per loan, named after the borrowing reader
+    assert await library.scalar(
+        "SELECT array_agg(DISTINCT name) || count(*)::text FROM histories h "
+        "JOIN book_copies c ON c.serial_num = h.copy_id WHERE c.book_id = ANY(:books)",
+        books=book_ids,
+    ) == ["Иван", str(BOOKS * COPIES)]
+
+
+async def test_a_loan_is_returned_once(library):
+    book_id, (serial_num,) = await library.book(copies=1, status="RESERVED")
+    (reader_id,) = await library.readers(1)
+    async with db.unit_of_work():
+        loan = await Deps.loan_service().create_loan(LoanCreateDTO(reader_id=reader_id, book_id=book_id))
+
+    async def give_back(loan_id: int):
+        async with db.unit_of_work():
+            try:
+                await Deps.loan_service().set_loan_as_returned(loan_id)
+                return "returned"
+            except HTTPException as error:
+                return error.status_code
+
+    results = Counter(await asyncio.gather(*(give_back(loan.id) for _ in range(20))))
+
+    assert results == {"returned": 1, 409: 19}
+    assert await give_back(-1) == 404
+    assert await library.scalar(
+        "SELECT status::text FROM book_copies WHERE serial_num = :serial_num", serial_num=serial_num
+    ) == "AVAILABLE"
@@ -0,0 +1,12 @@
+from app.repositories.overdue_loans import TRY_REFRESH_LOCK, OverdueLoanRepository
+
+
+async def test_a_worker_skips_the_refresh_another_one_runs(database):
+    repository = OverdueLoanRepository()
+
+    async with database.get_session() as other_worker:
+        assert (await other_worker.execute(TRY_REFRESH_LOCK)).scalar()
+        assert await repository.refresh() is False
+        await other_worker.rollback()
+
+    assert await repository.refresh() is True
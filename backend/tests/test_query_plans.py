@@ -0,0 +1,56 @@
+import json
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.models import BookCopyORM, BookORM, HistoryORM, LoanORM, ReaderORM, RequestORM
+from app.models.types import BookCopyStatus, RequestStatus
+from app.repositories.explain import Explain
+from app.repositories.waitlist import RETURN_COPY
+
+# hot lookups of the repositories and services, each must be answered by an index
+QUERIES = {
+    "copies of a book by status": (
+        select(BookCopyORM).where(BookCopyORM.book_id == 1, BookCopyORM.status == BookCopyStatus.AVAILABLE),
+        "book_copies",
+    ),
+    "oldest queued request of a book": (
+        select(RequestORM)
+        .where(RequestORM.book_id == 1, RequestORM.status == RequestStatus.QUEUED)
+        .order_by(RequestORM.created_at, RequestORM.id)
+        .limit(1),
+        "requests",
+    ),
+    "requests of a reader": (select(RequestORM).where(RequestORM.reader_id == 1), "requests"),
+    "loans of a reader": (select(LoanORM).where(LoanORM.reader_id == 1), "loans"),
+    "loans of a copy": (select(LoanORM).where(LoanORM.copy_id == "0"), "loans"),
+    "overdue loans": (
+        select(LoanORM).where(LoanORM.due_date < func.now(), LoanORM.return_date.is_(None)),
+        "loans",
+    ),
+    "histories of a copy": (select(HistoryORM).where(HistoryORM.copy_id == "0"), "histories"),
+    "reader by email": (select(ReaderORM).where(ReaderORM.email == "reader@example.com"), "readers"),
+    "available books": (select(BookORM.id).where(BookORM.available_count > 0), "books"),
+    "waitlist return": (RETURN_COPY.bindparams(serial_num="0"), "requests"),
+}
+
+
+def sequential_scans(node: dict) -> set:
+    scans = {node["Relation Name"]} if node["Node Type"] == "Seq Scan" else set()
+    for child in node.get("Plans", []):
+        scans |= sequential_scans(child)
+    return scans
+
+
+@pytest.mark.parametrize("name", QUERIES)
+async def test_query_uses_index(database, name):
+    statement, table = QUERIES[name]
+
+    async with database.engine.connect() as connection:
+        # tiny test tables are cheaper to scan, only a missing index may force it
+        await connection.execute(text("SET enable_seqscan = off"))
+        plan = (await connection.execute(Explain(statement))).scalar()
+        await connection.rollback()
+
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    assert table not in sequential_scans(plan[0]["Plan"]), json.dumps(plan, indent=2)
@@ -0,0 +1,30 @@
+import pytest
+
+from app.config.database.db import Database
+from app.config.database.db_config import db_config
+
+
+@pytest.fixture
+async def replicated():
+    """The primary standing in for its own replica, a primary is never behind."""
+    database = Database(url=db_config.database_url, replica_url=db_config.database_url)
+    yield database
+    await database.engine.dispose()
+    await database.replica_engine.dispose() # type: ignore
+
+
+async def test_read_only_unit_of_work_reads_from_the_replica(replicated):
+    async with replicated.unit_of_work(read_only=True) as unit_of_work:
+        async with replicated.session() as session:
+            assert session is unit_of_work.replica_session
+
+
+async def test_primary_reads_skip_the_replica(replicated):
+    async with replicated.unit_of_work(read_only=True) as unit_of_work:
+        with replicated.primary_reads():
+            async with replicated.session() as session:
+                assert session is unit_of_work.session
+
+    with replicated.primary_reads():
+        async with replicated.session() as session:
+            assert session.bind is replicated.engine
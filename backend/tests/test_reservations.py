@@ -0,0 +1,62 @@
+import asyncio
+from collections import Counter
+
+from fastapi import HTTPException
+
+from app.config.database import db
+from app.deps import Deps
+from app.models.types import RequestStatus
+
+CONCURRENCY = 200
+
+
+async def test_parallel_reservations_get_distinct_copies(library):
+    book_id, serials = await library.book(copies=5)
+
+    async def reserve():
+        async with db.unit_of_work():
+            book_copy = await Deps.book_service().reserve_copy(book_id)
+            return book_copy.serial_num if book_copy is not None else None
+
+    reserved = await asyncio.gather(*(reserve() for _ in range(CONCURRENCY)))
+
+    claimed = [serial for serial in reserved if serial is not None]
+    assert sorted(claimed) == sorted(serials)
+    assert await library.scalar(
+        "SELECT count(*) FROM book_copies WHERE book_id = :id AND status = 'RESERVED'", id=book_id
+    ) == 5
+
+
+async def test_parallel_requests_reserve_then_queue(library):
+    book_id, _ = await library.book(copies=3)
+    readers = await library.readers(CONCURRENCY)
+
+    async def request(reader_id):
+        async with db.unit_of_work():
+            return (await Deps.request_service().create_request(reader_id, book_id)).status
+
+    statuses = Counter(await asyncio.gather(*(request(reader_id) for reader_id in readers)))
+
+    assert statuses == {RequestStatus.PENDING: 3, RequestStatus.QUEUED: CONCURRENCY - 3}
+    # the counters kept by triggers agree with the rows
+    counters = await library.scalar(
+        "SELECT array[available_count, reserved_count, queue_length] FROM books WHERE id = :id", id=book_id
+    )
+    assert counters == [0, 3, CONCURRENCY - 3]
+
+
+async def test_parallel_requests_of_one_reader_respect_the_limit(library):
+    book_ids = [(await library.book(copies=1))[0] for _ in range(10)]
+    reader_id, = await library.readers(1)
+
+    async def request(book_id):
+        async with db.unit_of_work():
+            try:
+                await Deps.request_service().create_request(reader_id, book_id)
+                return "created"
+            except HTTPException as error:
+                return error.status_code
+
+    results = Counter(await asyncio.gather(*(request(book_ids[i % 10]) for i in range(60))))
+
+    assert results == {"created": 5, 406: 55}
@@ -0,0 +1,45 @@
+import asyncio
+
+from app.config.database import db
+from app.utils.single_flight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    assert await asyncio.gather(*(flight.do("key", compute) for _ in range(50))) == [1] * 50
+    assert not flight.in_flight("key")
+
+
+async def test_computation_does_not_run_in_the_callers_unit_of_work(database):
+    flight = SingleFlight()
+
+    async def compute():
+        return db.current_unit_of_work()
+
+    async with database.unit_of_work():
+        assert await flight.do("key", compute) is None
+
+
+async def test_a_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(flight.do("key", compute))
+    second = asyncio.create_task(flight.do("key", compute))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "done"
@@ -0,0 +1,19 @@
+import pytest
+from fastapi import HTTPException
+
+from app.models import BookORM
+from app.repositories.sqlalchemy import SqlAlchemyRepository
+
+repository = SqlAlchemyRepository(BookORM)
+
+
+def test_pages_are_sorted_by_a_column_then_the_primary_key():
+    assert repository.get_sort_columns("title") == (BookORM.__table__.c.title, BookORM.__table__.c.id)
+    assert repository.get_sort_columns(None) == (BookORM.__table__.c.id, BookORM.__table__.c.id)
+
+
+def test_an_unknown_column_is_a_bad_request():
+    with pytest.raises(HTTPException) as error:
+        repository.get_sort_columns("nope")
+
+    assert error.value.status_code == 400
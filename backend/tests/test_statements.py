@@ -0,0 +1,29 @@
+import pytest
+
+from app.config.database.statements import fingerprint
+
+
+def params(start: int, count: int, cast: str = "::INTEGER") -> str:
+    return ", ".join(f"${n}{cast}" for n in range(start, start + count))
+
+
+@pytest.mark.parametrize("render", [
+    lambda n: f"SELECT books.id FROM books WHERE books.id IN ({params(1, n)})",
+    lambda n: f"SELECT loans.id FROM loans WHERE loans.due_date < {params(1, 1, '::TIMESTAMP WITHOUT TIME ZONE')} "
+              f"AND loans.copy_id IN ({params(2, n, '::VARCHAR[]')})",
+    lambda n: "INSERT INTO readers (email, verified) VALUES "
+              + ", ".join(f"({params(2 * i + 1, 1, '::VARCHAR')}, {params(2 * i + 2, 1, '::BOOLEAN')})" for i in range(n))
+              + " RETURNING readers.id",
+    lambda n: "INSERT INTO book_copies (serial_num, book_id) SELECT p0::VARCHAR, p1::INTEGER FROM (VALUES "
+              + ", ".join(f"({params(2 * i + 1, 2)}, {i})" for i in range(n))
+              + ") AS imp_sen(p0, p1, sen_counter) ORDER BY sen_counter",
+])
+def test_fingerprint_ignores_the_number_of_parameters(render):
+    keys = {fingerprint(render(n))[0] for n in (1, 2, 7, 50)}
+
+    assert len(keys) == 1
+
+
+def test_fingerprint_keeps_the_rest_of_the_statement():
+    assert fingerprint("SELECT 1 FROM books WHERE id = $1::INTEGER")[1] == "SELECT 1 FROM books WHERE id = ?"
+    assert fingerprint("SELECT 1 FROM books WHERE id = $1")[0] != fingerprint("SELECT 1 FROM loans WHERE id = $1")[0]
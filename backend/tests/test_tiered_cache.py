@@ -0,0 +1,58 @@
+import asyncio
+
+from app.utils.tiered_cache import MemoryTier, TieredBackend
+
+
+class SlowRedis:
+    """Answers a get once released, so invalidations can land during the round trip."""
+
+    def __init__(self, values):
+        self.values = values
+        self.released = asyncio.Event()
+
+    async def get_with_ttl(self, key):
+        await self.released.wait()
+        return 60, self.values.get(key)
+
+
+async def fill_during(invalidation) -> MemoryTier:
+    memory = MemoryTier(max_bytes=1024, ttl=60)
+    redis = SlowRedis({"response:1": "body"})
+    backend = TieredBackend(redis, memory) # type: ignore
+
+    fill = asyncio.create_task(backend.fill("response:1"))
+    await asyncio.sleep(0)
+    invalidation(memory)
+    redis.released.set()
+
+    assert await fill == (60, "body")
+    return memory
+
+
+async def test_fill_keeps_its_value_when_another_key_is_invalidated():
+    memory = await fill_during(lambda memory: memory.invalidate(key="table:books"))
+
+    assert memory.get("response:1")[1] == "body"
+
+
+async def test_fill_drops_its_value_when_the_key_is_invalidated():
+    memory = await fill_during(lambda memory: memory.invalidate(key="response:1"))
+
+    assert memory.get("response:1")[1] is None
+
+
+async def test_fill_drops_its_value_when_everything_is_invalidated():
+    memory = await fill_during(lambda memory: memory.invalidate(namespace=None))
+
+    assert memory.get("response:1")[1] is None
+
+
+def test_forgotten_invalidations_count_as_recent():
+    memory = MemoryTier(max_bytes=1024, ttl=60)
+    memory.max_invalidated = 2
+    generation = memory.generation
+    for key in ("a", "b", "c"):
+        memory.invalidate(key=key)
+
+    assert memory.invalidated_since("a", generation)
+    assert not memory.invalidated_since("a", memory.generation)
@@ -0,0 +1,72 @@
+import asyncio
+from typing import List
+
+from sqlalchemy import text
+
+from app.config.database import db
+from app.repositories.waitlist import WaitlistRepository
+
+
+async def queue(book_id: int, readers: List[int]) -> List[int]:
+    """Queued requests of the readers for the book, the first reader's the oldest."""
+    async with db.transaction() as session:
+        return list((await session.execute(
+            text(
+                "INSERT INTO requests (reader_id, book_id, status, created_at) "
+                "SELECT reader_id, :book_id, 'QUEUED', now() - (:count - ord) * interval '1 minute' "
+                "FROM unnest(CAST(:readers AS int[])) WITH ORDINALITY AS r(reader_id, ord) "
+                "ORDER BY ord RETURNING id"
+            ),
+            {"book_id": book_id, "readers": readers, "count": len(readers)},
+        )).scalars())
+
+
+async def statuses(library, request_ids: List[int]) -> List[str]:
+    return await library.scalar(
+        "SELECT array_agg(status::text ORDER BY array_position(CAST(:ids AS int[]), id)) "
+        "FROM requests WHERE id = ANY(:ids)",
+        ids=request_ids,
+    )
+
+
+async def test_the_oldest_queued_request_gets_the_copy(library):
+    book_id, (serial_num,) = await library.book(copies=1, status="BORROWED")
+    readers = await library.readers(3)
+    requests = await queue(book_id, readers)
+
+    book_copy = await WaitlistRepository().return_copy(serial_num)
+
+    assert book_copy.status == "RESERVED"
+    assert (book_copy.request_id, book_copy.reader_id) == (requests[0], readers[0])
+    assert await statuses(library, requests) == ["PENDING", "QUEUED", "QUEUED"]
+
+
+async def test_a_waiter_locked_by_another_return_is_skipped(library):
+    book_id, (_, serial_num) = await library.book(copies=2, status="BORROWED")
+    requests = await queue(book_id, await library.readers(2))
+
+    async with db.get_session() as other:
+        await other.execute(text("SELECT 1 FROM requests WHERE id = :id FOR UPDATE"), {"id": requests[0]})
+        # waiting for the lock would time out instead of skipping the waiter
+        book_copy = await asyncio.wait_for(WaitlistRepository().return_copy(serial_num), timeout=5)
+        await other.rollback()
+
+    assert book_copy.request_id == requests[1]
+    assert await statuses(library, requests) == ["QUEUED", "PENDING"]
+
+
+async def test_the_copy_is_available_when_nobody_waits(library):
+    _, (serial_num,) = await library.book(copies=1, status="BORROWED")
+
+    book_copy = await WaitlistRepository().return_copy(serial_num)
+
+    assert book_copy.status == "AVAILABLE"
+    assert book_copy.request_id is None
+
+
+async def test_a_copy_that_is_not_borrowed_pops_nobody(library):
+    book_id, (serial_num,) = await library.book(copies=1, status="AVAILABLE")
+    requests = await queue(book_id, await library.readers(1))
+
+    assert await WaitlistRepository().return_copy(serial_num) is None
+    assert await statuses(library, requests) == ["QUEUED"]
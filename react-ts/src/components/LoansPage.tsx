@@ -72,22 +72,25 @@ const LoansPage = () => {
     setLoading(true);
     setError(null);
     try {
-      const params = new URLSearchParams();
-      // Если API требует limit/offset, можно временно поставить большой limit:
-      params.set('limit', '10000');
-      params.set('offset', '0');
-
-      const resp = await fetch(`${API_BASE}/loans?${params.toString()}`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      if (!resp.ok) throw new Error('Не удалось получить список займов');
-
-      const contentType = resp.headers.get('content-type') || '';
-      const text = await resp.text();
-      const data = contentType.includes('application/json') ? JSON.parse(text) : JSON.parse(text);
-
-      const parsed = data as { items?: Loan[] };
-      setLoans(parsed.items || []);
+      // API отдаёт не больше 500 записей за раз — идём по страницам через next_cursor
+      const all: Loan[] = [];
+      let cursor: string | null = null;
+      do {
+        const params = new URLSearchParams();
+        params.set('limit', '500');
+        if (cursor) params.set('after', cursor);
+
+        const resp = await fetch(`${API_BASE}/loans?${params.toString()}`, {
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        if (!resp.ok) throw new Error('Не удалось получить список займов');
+
+        const parsed = (await resp.json()) as { items?: Loan[]; next_cursor?: string | null };
+        all.push(...(parsed.items || []));
+        cursor = parsed.next_cursor ?? null;
+      } while (cursor);
+
+      setLoans(all);
     } catch (e) {
       setError(e instanceof Error ? e.message : 'Unknown error');
     } finally {